@@ -0,0 +1,43 @@
+""" Columns: tables in markdown, written the way you would in email.
+
+    Importing columns loads only the table model and detection.  The names in _LAZY, such as the
+    extension, the emitters, iter_html and the table index, are imported when first used, and
+    Python-Markdown with them.
+"""
+from .scan import Limits, Segment, TableScanner, get_columns, iter_tables, scan_document, update_spaces_in_lines
+from .table import (Align, Cell, Column, ColumnType, Kinds, ListInfo, Shape, Table, TableRow, lex_number,
+                    parse_numbers)
+from .util import ColumnsException, ColumnsLimitExceeded
+
+_LAZY = {
+    'ColumnsBlockProcessor': 'extension',
+    'ColumnsExtension': 'extension',
+    'EMITTERS': 'emit',
+    'RenderedCell': 'emit',
+    'RenderedRow': 'emit',
+    'RenderedTable': 'emit',
+    'emitter': 'emit',
+    'render_tables': 'emit',
+    'ColumnBuffers': 'export',
+    'TableBuffers': 'export',
+    'PACK_VERSION': 'packed',
+    'PackedTable': 'packed',
+    'pack_table': 'packed',
+    'iter_html': 'stream',
+    'IndexEntry': 'index',
+    'TableIndex': 'index',
+    'build_index': 'index',
+}
+
+
+def __getattr__(name):
+    if name in _LAZY:
+        from importlib import import_module
+        return getattr(import_module(f'.{_LAZY[name]}', __name__), name)
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+
+# noinspection PyPep8Naming
+def makeExtension(**kwargs):
+    from .extension import ColumnsExtension
+    return ColumnsExtension(**kwargs)
@@ -0,0 +1,108 @@
+""" Command line: python -m columns serve|watch|index [options] """
+import argparse
+import sys
+
+
+def extension_configs(options):
+    """ ColumnsExtension options from NAME=VALUE strings, converted to the type of each default """
+    from .extension import ColumnsExtension
+    defaults = ColumnsExtension().getConfigs()
+    configs = {}
+    for option in options:
+        name, _, value = option.partition('=')
+        name = name.replace('-', '_')
+        if name not in defaults:
+            raise SystemExit(f'Unknown option {name}, not one of {", ".join(defaults)}')
+        default = defaults[name]
+        if isinstance(default, bool):
+            configs[name] = value.lower() in ('1', 'true', 'yes', 'on')
+        else:
+            configs[name] = type(default)(value)
+    return configs
+
+
+def serve(args):
+    from .server import RenderService, make_server
+    service = RenderService(extension_configs(args.option), args.extension, args.pool_size, args.cache_size)
+    server = make_server(args.host, args.port, service, args.verbose)
+    host, port = server.server_address[:2]
+    print(f'Serving markdown rendering on http://{host}:{port}/render, stats at /stats', file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def watch(args):
+    import markdown
+    from .extension import ColumnsExtension
+    from .watch import Watcher
+    md = markdown.Markdown(extensions=args.extension + [ColumnsExtension(**extension_configs(args.option))])
+    watcher = Watcher(args.source, args.output, md, args.interval, args.debounce, verbose=True)
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        pass
+
+
+def index(args):
+    from .emit import EMITTERS
+    from .index import TableIndex, build_index
+    tables = build_index(args.file, args.tab_length) if args.rebuild else TableIndex.open(args.file, args.tab_length)
+    n = args.table
+    if args.header is not None:
+        n = tables.find(args.header)
+        if n is None:
+            raise SystemExit(f'No table in {args.file} has a header matching {args.header}')
+    if n is None:
+        for n, entry in enumerate(tables.entries):
+            header = '  '.join(entry.header) if entry.header is not None else '(no header)'
+            print(f'{n}\tline {entry.line + 1}\t{entry.lines} lines\t{header}')
+        return
+    if not 0 <= n < len(tables):
+        raise SystemExit(f'{args.file} has {len(tables)} tables')
+    if args.format not in EMITTERS:
+        raise SystemExit(f'Unknown format {args.format}, not one of {", ".join(EMITTERS)}')
+    sys.stdout.write(tables.render(n, args.format))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m columns', description='Tables in markdown, written as in email.')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    p = commands.add_parser('serve', help='HTTP service: POST markdown to /render, GET /stats')
+    p.add_argument('--host', default='127.0.0.1')
+    p.add_argument('--port', type=int, default=8000)
+    p.add_argument('--pool-size', type=int, default=8, help='Markdown instances kept warm')
+    p.add_argument('--cache-size', type=int, default=256, help='rendered pages kept by ETag')
+    p.add_argument('-x', '--extension', action='append', default=[], help='other markdown extension to use')
+    p.add_argument('-o', '--option', action='append', default=[], help='columns option as NAME=VALUE')
+    p.add_argument('-v', '--verbose', action='store_true', help='log each request')
+    p.set_defaults(run=serve)
+
+    p = commands.add_parser('watch', help='render *.md under a directory to HTML, and again as they change')
+    p.add_argument('source', help='directory of markdown files')
+    p.add_argument('--output', help='directory for the HTML, default next to each file')
+    p.add_argument('--interval', type=float, default=0.05, help='seconds between checks for changes')
+    p.add_argument('--debounce', type=float, default=0.03, help='seconds of quiet before rendering changes')
+    p.add_argument('-x', '--extension', action='append', default=[], help='other markdown extension to use')
+    p.add_argument('-o', '--option', action='append', default=[], help='columns option as NAME=VALUE')
+    p.set_defaults(run=watch)
+
+    p = commands.add_parser('index', help='list the tables of a big markdown file, or print one, through an index')
+    p.add_argument('file', help='markdown file; the index is kept beside it as FILE.tables.json')
+    p.add_argument('-n', '--table', type=int, help='print this table, counting from 0')
+    p.add_argument('--header', help='print the first table with a header matching this regular expression')
+    p.add_argument('-f', '--format', default='text', help='format to print the table in, default text')
+    p.add_argument('--tab-length', type=int, default=4)
+    p.add_argument('--rebuild', action='store_true', help='scan the file again even if the index is up to date')
+    p.set_defaults(run=index)
+
+    args = parser.parse_args(argv)
+    args.run(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,156 @@
+""" Caches kept across renders. """
+from collections import Counter, OrderedDict
+from threading import Lock
+
+
+class RejectionCache:
+    """ Bounded LRU of candidate blocks that were found not to be tables, so a repeat
+        candidate is skipped without scanning it again.
+
+        An entry is found by the hash of the first block and the context (code_indent and limits),
+        then checked against a hash of every block the rejection looked at.  If the rejection
+        came from running out of blocks, the candidate must also end in the same place.
+    """
+    _shared = {}
+    _shared_lock = Lock()
+
+    def __init__(self, size=1024):
+        self.size = size
+        self.entries = OrderedDict()  # (context, hash of first block) -> (examined, ran_out, hash, reason, is_limit)
+        self.lock = Lock()
+        self.lookups = 0
+        self.hits = Counter()  # reason -> lookups answered by the cache
+        self.stores = Counter()  # reason -> rejections found by scanning
+
+    @classmethod
+    def shared(cls, size):
+        """ one cache per size for the whole process, so it outlives Markdown instances """
+        with cls._shared_lock:
+            if size not in cls._shared:
+                cls._shared[size] = cls(size)
+            return cls._shared[size]
+
+    @staticmethod
+    def _hash(blocks, examined):
+        return hash(tuple(blocks[:examined]))
+
+    def lookup(self, blocks, context):
+        """ returns (reason, blocks examined, is_limit) of a cached rejection of blocks, or None """
+        if not blocks:
+            return None
+        key = (context, hash(blocks[0]))
+        with self.lock:
+            self.lookups += 1
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            examined, ran_out, hashed, reason, is_limit = entry
+            if len(blocks) < examined or (ran_out and len(blocks) != examined):
+                return None
+            if self._hash(blocks, examined) != hashed:
+                return None
+            self.entries.move_to_end(key)
+            self.hits[reason] += 1
+        return reason, examined, is_limit
+
+    def store(self, blocks, examined, ran_out, context, reason, is_limit=False):
+        if not blocks or self.size <= 0:
+            return
+        entry = (examined, ran_out, self._hash(blocks, examined), reason, is_limit)
+        with self.lock:
+            self.entries[(context, hash(blocks[0]))] = entry
+            self.entries.move_to_end((context, hash(blocks[0])))
+            self.stores[reason] += 1
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+
+    def stats(self):
+        """ lookups and hit rates, overall and for each rejection reason """
+        with self.lock:
+            hits = sum(self.hits.values())
+            return {
+                'entries': len(self.entries),
+                'lookups': self.lookups,
+                'hits': hits,
+                'hit_rate': hits / self.lookups if self.lookups else 0.0,
+                'reasons': {reason: {'hits': self.hits[reason],
+                                     'stores': self.stores[reason],
+                                     'hit_rate': self.hits[reason] / (self.hits[reason] + self.stores[reason])}
+                            for reason in sorted(set(self.hits) | set(self.stores))},
+            }
+
+
+class RenderCache:
+    """ Bounded LRU of rendered output by key, such as documents by ETag, safe across threads """
+
+    def __init__(self, size=256):
+        self.size = size
+        self.entries = OrderedDict()  # key -> rendered output
+        self.lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self.lock:
+            value = self.entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        if self.size <= 0:
+            return
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {'entries': len(self.entries), 'lookups': lookups, 'hits': self.hits,
+                    'hit_rate': self.hits / lookups if lookups else 0.0}
+
+
+class IncludeCache(RenderCache):
+    """ RenderedTables of included files by (path, mtime, size, show_rows, exact), shared by the process """
+    _shared = {}
+    _shared_lock = Lock()
+
+    @classmethod
+    def shared(cls, size):
+        with cls._shared_lock:
+            if size not in cls._shared:
+                cls._shared[size] = cls(size)
+            return cls._shared[size]
+
+
+class TableCache:
+    """ Rendered tables of one document by their lines and column stops, so tables that didn't
+        change between renders of the document aren't parsed again.  Only tables used by the
+        latest render are kept: call next_render() before each render. """
+
+    def __init__(self):
+        self.previous = {}
+        self.current = {}
+        self.hits = 0
+        self.misses = 0
+
+    def next_render(self):
+        self.previous, self.current = self.current, {}
+
+    def get(self, key):
+        table = self.current.get(key) or self.previous.get(key)
+        if table is None:
+            self.misses += 1
+        else:
+            self.current[key] = table
+            self.hits += 1
+        return table
+
+    def put(self, key, table):
+        self.current[key] = table
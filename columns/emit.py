@@ -0,0 +1,233 @@
+""" Render once, emit many: a format-neutral rendered table, and emitters for each output format.
+
+    A RenderedTable is made once from a Table, after its calculated fields are filled in.
+    Emitters turn it into HTML, aligned plain text, LaTeX or GitHub pipe tables, without
+    going back to the Table.  New formats are added with @emitter('name').
+"""
+# noinspection PyPep8Naming
+import xml.etree.ElementTree as etree
+
+from .scan import scan_document
+from .table import Align, Kinds
+from .util import ColumnsException
+
+
+class RenderedCell:
+    __slots__ = ('text', 'list_')
+
+    def __init__(self, text, list_=None):
+        self.text = text
+        self.list_ = list_  # ListInfo, with depth and order_sequence set, or None
+
+
+class RenderedRow:
+    __slots__ = ('kind', 'text', 'cells')
+
+    def __init__(self, kind, text, cells):
+        self.kind = kind  # Kinds: header, data, blank_sep, footer or elided
+        self.text = text  # the source line, or what an elided row says
+        self.cells = cells
+
+
+class RenderedTable:
+    """ What a table shows, in any format: its rows and cells, and which columns are right aligned """
+
+    def __init__(self, col_alignment, rows):
+        self.col_alignment = col_alignment
+        self.rows = rows
+
+    @classmethod
+    def from_table(cls, table):
+        rows = [RenderedRow(row.kind, row.text, [RenderedCell(c.text, c.list_) for c in row.cells])
+                for row in table.rows]
+        return cls(list(table.col_alignment), rows)
+
+    @property
+    def num_columns(self):
+        return len(self.col_alignment)
+
+    def emit(self, format_, **options):
+        if format_ not in EMITTERS:
+            raise ColumnsException(f'Unknown table format: {format_}, not one of {", ".join(EMITTERS)}')
+        return EMITTERS[format_](self, **options)
+
+
+EMITTERS = {}  # format name -> function(RenderedTable, **options) returning a string
+
+
+def emitter(name):
+    """ register a function(RenderedTable, **options) -> str as the emitter for a format """
+    def register(function):
+        EMITTERS[name] = function
+        return function
+
+    return register
+
+
+def render_tables(lines, formats=('html', 'text'), tab_length=4, limits=None, show_rows=None, exact=False):
+    """ Yield {format: output} for each table in markdown lines, each table parsed once for all formats """
+    for segment in scan_document(lines, tab_length, limits, show_rows, exact):
+        if segment.table:
+            rendered = RenderedTable.from_table(segment.table)
+            yield {format_: rendered.emit(format_) for format_ in formats}
+
+
+def list_marker(list_):
+    return f'{list_.order_sequence}. ' if list_.is_ordered else '- '
+
+
+# HTML
+
+def html_row(t_table, rendered, row):
+    """ add the elements for one row to t_table """
+    if row.kind == Kinds.blank_sep:
+        t_tr = etree.SubElement(t_table, 'tr', {'style': 'border-bottom:1px solid black'})  # And me
+        etree.SubElement(t_tr, 'td', {'colspan': "100%"})
+    elif row.kind == Kinds.elided:
+        t_tr = etree.SubElement(t_table, 'tr', {'class': 'elided'})
+        etree.SubElement(t_tr, 'td', {'colspan': "100%", 'align': 'center'}).text = row.text
+    else:
+        if row.kind == Kinds.header:
+            t_row = etree.SubElement(etree.SubElement(t_table, 'thead'), 'tr')
+            tag_ = 'th'
+        elif row.kind == Kinds.footer:
+            t_row = etree.SubElement(etree.SubElement(t_table, 'tfoot'), 'tr')
+            tag_ = 'td'
+        elif row.kind == Kinds.data:
+            t_row = etree.SubElement(t_table, 'tr')
+            tag_ = 'td'
+        else:
+            raise ColumnsException(f'Internal error, odd kind: {row.kind} in {row.text}')
+
+        for c_i, c in enumerate(row.cells):
+            align = {'align': ('left' if rendered.col_alignment[c_i] == Align.left else 'right')}
+            if not c.list_:
+                # normal headers, footers, and non-list data
+                etree.SubElement(t_row, tag_, align).text = c.text if c.text else '&nbsp;'
+            else:
+                # <td><span class="depth2"><ul><ol><li>foo</li></ol></ul></span></td>
+                class_ = f'depth{c.list_.depth}'
+                el = etree.SubElement(t_row, tag_, align)
+                el = etree.SubElement(el, 'span', {'class': class_})
+                for _ in range(c.list_.depth - 1):
+                    el = etree.SubElement(el, 'ul')
+                if c.list_.is_ordered:
+                    el = etree.SubElement(el, 'ol', {'start': str(c.list_.order_sequence)})
+                else:
+                    el = etree.SubElement(el, 'ul')
+                el = etree.SubElement(el, 'li')
+                el.text = c.text if c.text else '&nbsp;'
+
+
+@emitter('html')
+def emit_html(rendered):
+    """ the table as HTML, with cell text as is: inline markdown is left to ColumnsBlockProcessor """
+    from markdown.serializers import to_html_string
+    t_table = etree.Element('table', {'class': 'columns'})
+    for row in rendered.rows:
+        html_row(t_table, rendered, row)
+    return to_html_string(t_table)
+
+
+# Plain text, as in email
+
+def text_cell(cell):
+    if not cell.list_:
+        return cell.text
+    return '  ' * (cell.list_.depth - 1) + list_marker(cell.list_) + cell.text
+
+
+@emitter('text')
+def emit_text(rendered, gap=2):
+    """ the table as aligned plain text, with rules under the header and over the footer """
+    texts = [[text_cell(c) for c in row.cells] for row in rendered.rows]
+    widths = [0] * rendered.num_columns
+    for row, cells in zip(rendered.rows, texts):
+        if row.kind in (Kinds.header, Kinds.data, Kinds.footer):
+            widths = [max(w, len(t)) for w, t in zip(widths, cells)]
+    spacer = ' ' * gap
+    rule = spacer.join('-' * w for w in widths)
+    lines = []
+    for row, cells in zip(rendered.rows, texts):
+        if row.kind == Kinds.blank_sep:
+            lines.append('')
+        elif row.kind == Kinds.elided:
+            lines.append(row.text.center(len(rule)))
+        else:
+            if row.kind == Kinds.footer:
+                lines.append(rule)
+            lines.append(spacer.join(t.rjust(w) if a == Align.right else t.ljust(w)
+                                     for t, w, a in zip(cells, widths, rendered.col_alignment)))
+            if row.kind == Kinds.header:
+                lines.append(rule)
+    return '\n'.join(line.rstrip() for line in lines) + '\n'
+
+
+# LaTeX
+
+LATEX_SPECIALS = str.maketrans({'\\': r'\textbackslash{}', '&': r'\&', '%': r'\%', '$': r'\$', '#': r'\#',
+                                '_': r'\_', '{': r'\{', '}': r'\}', '~': r'\textasciitilde{}',
+                                '^': r'\textasciicircum{}'})
+
+
+def latex_cell(cell):
+    text = cell.text.translate(LATEX_SPECIALS)
+    if not cell.list_:
+        return text
+    marker = f'{cell.list_.order_sequence}.\\ ' if cell.list_.is_ordered else '\\textbullet\\ '
+    return '\\quad ' * (cell.list_.depth - 1) + marker + text
+
+
+@emitter('latex')
+def emit_latex(rendered):
+    """ the table as a LaTeX tabular, with \\hline around the header and footer and for blank lines """
+    spec = ''.join('r' if a == Align.right else 'l' for a in rendered.col_alignment)
+    lines = [f'\\begin{{tabular}}{{{spec}}}', '\\hline']
+    for row in rendered.rows:
+        if row.kind == Kinds.blank_sep:
+            lines.append('\\hline')
+        elif row.kind == Kinds.elided:
+            text = row.text.translate(LATEX_SPECIALS)
+            lines.append(f'\\multicolumn{{{rendered.num_columns}}}{{c}}{{\\emph{{{text}}}}} \\\\')
+        else:
+            cells = [latex_cell(c) for c in row.cells]
+            if row.kind in (Kinds.header, Kinds.footer):
+                cells = [f'\\textbf{{{c}}}' if c else '' for c in cells]
+            if row.kind == Kinds.footer:
+                lines.append('\\hline')
+            lines.append(' & '.join(cells) + ' \\\\')
+            if row.kind == Kinds.header:
+                lines.append('\\hline')
+    lines += ['\\hline', '\\end{tabular}']
+    return '\n'.join(lines) + '\n'
+
+
+# GitHub flavored markdown
+
+def gfm_cell(cell):
+    text = cell.text.replace('|', '\\|')
+    if not cell.list_:
+        return text
+    return '&nbsp;&nbsp;' * (cell.list_.depth - 1) + list_marker(cell.list_) + text
+
+
+@emitter('gfm')
+def emit_gfm(rendered):
+    """ the table as a GitHub pipe table.  Pipe tables need a header, so a table without one gets
+        an empty one.  Footer cells are bold, and blank separator lines are left out. """
+    def line(cells):
+        return '| ' + ' | '.join(cells) + ' |'
+
+    header = [''] * rendered.num_columns
+    lines = []
+    for row in rendered.rows:
+        if row.kind == Kinds.header:
+            header = [gfm_cell(c) for c in row.cells]
+        elif row.kind == Kinds.elided:
+            lines.append(line([f'*{row.text}*'] + [''] * (rendered.num_columns - 1)))
+        elif row.kind == Kinds.footer:
+            lines.append(line([f'**{gfm_cell(c)}**' if c.text else '' for c in row.cells]))
+        elif row.kind == Kinds.data:
+            lines.append(line([gfm_cell(c) for c in row.cells]))
+    rule = line(['---:' if a == Align.right else ':---' for a in rendered.col_alignment])
+    return '\n'.join([line(header), rule] + lines) + '\n'
@@ -0,0 +1,114 @@
+""" Data export of parsed tables: CSV and JSON written a row at a time, and columnar buffers.
+
+    The header row, if any, names the columns; every other row is exported with its kind.
+    Tables without a header have columns named column1, column2...
+"""
+import csv
+import json
+from array import array
+from math import isfinite
+
+from .table import NUMERIC_TYPES, Kinds
+
+
+def column_names(table):
+    header = table.rows[0] if table.rows[0].kind == Kinds.header else None
+    return [(header.cells[c_i].text if header else '') or f'column{c_i + 1}' for c_i in range(len(table.columns))]
+
+
+def body_rows(table):
+    return (row for row in table.rows if row.kind != Kinds.header)
+
+
+def list_columns(table):
+    """ indexes of the columns with list items """
+    return [c_i for c_i in range(len(table.columns)) if any(row.cells[c_i].list_ for row in table.rows)]
+
+
+def depth(cell):
+    return cell.list_.depth if cell.list_ else 0
+
+
+def json_value(value):
+    """ value, or None for nan and infinity, which JSON has no numbers for """
+    return value if value is None or isfinite(value) else None
+
+
+def write_csv(table, out, dialect='excel'):
+    """ Write the table to out, a text file opened with newline=''.
+        The fields are kind, each column, then the list depth of each column with list items. """
+    writer = csv.writer(out, dialect)
+    names, lists = column_names(table), list_columns(table)
+    writer.writerow(['kind'] + names + [f'{names[c_i]} depth' for c_i in lists])
+    for row in body_rows(table):
+        if row.kind == Kinds.elided:
+            writer.writerow([row.kind.name, row.text] + [''] * (len(names) - 1 + len(lists)))
+        else:
+            writer.writerow([row.kind.name] + [c.text for c in row.cells] + [depth(row.cells[c_i]) for c_i in lists])
+
+
+def write_json(table, out):
+    """ Write the table to out as one JSON object, a row at a time:
+        {"columns": [...], "types": [...], "rows": [{"kind", "cells", "values", "depths"}, ...]}.
+        values are the numbers in the cells, percentages as fractions, or null, as are nan and infinity.
+        depths are the list depth of each cell, 0 if not a list item, and only there if the table has lists.
+        Elided rows have just "kind" and "text". """
+    has_lists = bool(list_columns(table))
+    out.write('{"columns": %s, "types": %s, "rows": [' % (
+        json.dumps(column_names(table)), json.dumps([type_.name for type_ in table.col_types])))
+    for row_num, row in enumerate(body_rows(table)):
+        if row.kind == Kinds.elided:
+            record = {'kind': row.kind.name, 'text': row.text}
+        else:
+            record = {'kind': row.kind.name, 'cells': [c.text for c in row.cells],
+                      'values': [json_value(c.value) for c in row.cells]}
+            if has_lists:
+                record['depths'] = [depth(c) for c in row.cells]
+        out.write((',\n' if row_num else '\n') + json.dumps(record, allow_nan=False))
+    out.write('\n]}\n')
+
+
+class ColumnBuffers:
+    """ One column of an exported table, with an entry for each row but the header.
+        values is an array('d'), 0.0 where valid is 0, for numeric columns and None for the others.
+        Both take the buffer protocol: numpy.frombuffer(values) and numpy.frombuffer(valid, bool)
+        wrap them without copying. """
+
+    def __init__(self, name, type_, rows, c_i):
+        cells = [row.cells[c_i] if row.cells else None for row in rows]
+        self.name = name
+        self.type_ = type_
+        self.texts = [cell.text if cell else '' for cell in cells]
+        self.depths = bytearray(depth(cell) if cell else 0 for cell in cells)  # list depth, 0 if not a list item
+        self.valid = bytearray(len(cells))
+        self.values = None
+        if type_ in NUMERIC_TYPES:
+            self.values = array('d', bytes(8 * len(cells)))
+            for i, cell in enumerate(cells):
+                if cell and cell.value is not None:
+                    self.values[i] = cell.value
+                    self.valid[i] = 1
+
+    def memoryview(self):
+        """ the values as a memoryview of doubles, or None for a non-numeric column """
+        return memoryview(self.values) if self.values is not None else None
+
+
+class TableBuffers:
+    """ A table as columns of buffers, for analytics.  kinds has the Kinds of each row but the header. """
+
+    def __init__(self, table):
+        rows = list(body_rows(table))
+        self.kinds = bytearray(row.kind for row in rows)
+        self.columns = [ColumnBuffers(name, type_, rows, c_i)
+                        for c_i, (name, type_) in enumerate(zip(column_names(table), table.col_types))]
+
+    def __getitem__(self, name):
+        for column in self.columns:
+            if column.name == name:
+                return column
+        raise KeyError(name)
+
+    def data_mask(self):
+        """ bytearray of which rows are data rows, to pick them out of the other buffers """
+        return bytearray(kind == Kinds.data for kind in self.kinds)
@@ -0,0 +1,472 @@
+""" The Python-Markdown extension. """
+import csv
+import json
+# noinspection PyPep8Naming
+import xml.etree.ElementTree as etree
+from collections import Counter
+from sys import stderr
+from time import perf_counter
+
+from markdown.blockprocessors import BlockProcessor
+from markdown.extensions import Extension
+from markdown.preprocessors import Preprocessor
+from markdown.util import AtomicString
+
+from .cache import IncludeCache, RejectionCache
+from .emit import RenderedTable, html_row
+from .include import load_table, resolve
+from .patterns import RE_CELL, RE_INCLUDE, RE_TWO_SPACES
+from .scan import Limits, TableScanner, get_columns, update_spaces_in_lines
+from .slowlog import SlowTableLog
+from .table import Align, Kinds
+from .util import ColumnsException, ColumnsLimitExceeded
+
+# Renders the rows left out of a virtualized table, a batch at a time as the table scrolls into view.
+# Called by a script after each table with the table's rows in the JSON script before it.
+VIRTUAL_ROWS_SCRIPT = """
+function columnsVirtualRows(me) {
+  var payload = me.previousElementSibling, data = JSON.parse(payload.textContent);
+  var table = payload.previousElementSibling, body = table.tBodies[0] || table.createTBody();
+  var next = 0, batch = 200;
+  function cell(tr, c, i) {
+    var el = tr.insertCell(-1);
+    el.align = data.a[i] ? 'right' : 'left';
+    if (Array.isArray(c)) {  // [text, depth, ordered, start]
+      el = el.appendChild(document.createElement('span'));
+      el.className = 'depth' + c[1];
+      for (var d = 1; d < c[1]; d++) el = el.appendChild(document.createElement('ul'));
+      el = el.appendChild(document.createElement(c[2] ? 'ol' : 'ul'));
+      if (c[2]) el.start = c[3];
+      el = el.appendChild(document.createElement('li'));
+      c = c[0];
+    }
+    el.textContent = c || '\\u00a0';
+  }
+  function more() {
+    for (var end = Math.min(next + batch, data.r.length); next < end; next++) {
+      var r = data.r[next], tr = body.insertRow(-1), td;
+      if (r === 0) {  // blank separator
+        tr.style.borderBottom = '1px solid black';
+        tr.insertCell(-1).colSpan = 100;
+      } else if (typeof r === 'string') {  // elided rows
+        tr.className = 'elided';
+        td = tr.insertCell(-1);
+        td.colSpan = 100;
+        td.align = 'center';
+        td.textContent = r;
+      } else {
+        r.forEach(function (c, i) { cell(tr, c, i); });
+      }
+    }
+    if (next < data.r.length) watch();
+  }
+  function watch() {
+    if (!body.rows.length || !window.IntersectionObserver) return setTimeout(more, 0);
+    var seen = new IntersectionObserver(function (entries) {
+      if (entries[0].isIntersecting) { seen.disconnect(); more(); }
+    }, {rootMargin: '2000px'});
+    seen.observe(body.rows[body.rows.length - 1]);
+  }
+  watch();
+}
+"""
+
+
+def virtual_rows_payload(table, rows):
+    """ compact JSON of rows for VIRTUAL_ROWS_SCRIPT: a row is a list of cells, 0 for a blank
+        separator, or the text of an elided row.  A cell is its text, or [text, depth, ordered, start]
+        for a list item.  '<' is escaped so the JSON can't end its script element. """
+    def cell(c):
+        if not c.list_:
+            return c.text
+        return [c.text, c.list_.depth, int(c.list_.is_ordered), c.list_.order_sequence]
+
+    encoded = []
+    for row in rows:
+        if row.kind == Kinds.blank_sep:
+            encoded.append(0)
+        elif row.kind == Kinds.elided:
+            encoded.append(row.text)
+        else:
+            encoded.append([cell(c) for c in row.cells])
+    payload = {'a': [int(a == Align.right) for a in table.col_alignment], 'r': encoded}
+    return json.dumps(payload, ensure_ascii=False, separators=(',', ':')).replace('<', '\\u003c')
+
+
+class ColumnsBlockProcessor(BlockProcessor):
+    def __init__(self, parser, verbose, code_indent, style='default', limits=None, rejections=None,
+                 show_rows=None, virtual_rows=0, include_dir='', includes=None, slow_log=None, exact=False):
+        self.is_verbose = verbose
+        self.virtual_rows = virtual_rows  # body rows rendered as HTML before the rest go to the browser as JSON
+        self.was_script_emitted = False
+        self.show_rows = show_rows  # (first, last) data rows to show of big tables, or None for all
+        self.exact = exact  # sum columns as Decimals, keeping their decimal places
+        self.code_indent = code_indent
+        self.style = style
+        self.limits = limits or Limits()
+        self.limit_counts = Counter()  # limit name -> number of tables that tripped it
+        self.rejections = rejections  # RejectionCache, or None
+        self.tables = None  # TableCache of the document being rendered, or None
+        self.include_dir = include_dir  # where {{table data.csv}} files are read from, '' for no includes
+        self.includes = includes  # IncludeCache, or None
+        self.included = set()  # paths of the files included, for watching them
+        self.slow_log = slow_log  # SlowTableLog, or None
+        self.context = (code_indent, self.limits.signature())  # what else a rejection depends on
+        self.scanner = None
+        self.blocks_examined = 0
+        self.ran_out = False  # the last candidate ended because there were no more blocks
+        self.fallback_blocks = []  # rest of a candidate over a limit, left to markdown
+        self.was_style_emitted = False
+        self.tab_lines = {}  # line with markdown's tab expansion -> the line as written, for lines with tabs
+        self.text_blocks = set()  # blocks stream.iter_html found start no table in the whole document
+        self.next_block = None  # lines of the block after the text stream.iter_html converts, if it may go on
+        super().__init__(parser)
+        self.lines = []
+
+    def reset(self):
+        """ forget what was emitted for the last document, so the next one gets its own style and script """
+        self.was_style_emitted = False
+        self.was_script_emitted = False
+        self.fallback_blocks = []
+        self.tab_lines = {}
+
+    def verbose(self, reason):
+        if self.is_verbose:
+            msg = f'Columns: {reason}'
+            print(msg, file=stderr)
+
+    def test(self, parent, block):
+        # API entry point, just preliminary test to skip some blocks
+        if self.fallback_blocks:
+            if block is self.fallback_blocks[0]:
+                self.fallback_blocks.pop(0)
+                return False
+            self.fallback_blocks = []
+        if block in self.text_blocks:
+            return bool(self.include_dir and block.startswith('{{table'))
+        return bool(RE_TWO_SPACES.search(block)) or bool(self.include_dir and block.startswith('{{table')) or \
+            bool(self.tab_lines and any(line in self.tab_lines for line in block.split('\n')))
+
+    get_columns = staticmethod(get_columns)
+    update_spaces_in_lines = staticmethod(update_spaces_in_lines)
+
+    def find_table_extent(self, blocks):
+        """ Find number of blocks used in table, else throw ColumnsException.
+
+            A table extends through one or more blocks where it has columns of two or more
+            spaces running vertically through the text.  We check each block
+            until one fails, and then return the good matches.
+            returns number of blocks used, lines in the table, and list of (start, end) column indices.
+            Raises ColumnsLimitExceeded if the candidate goes over one of self.limits.
+        """
+        self.scanner = scanner = TableScanner(self.code_indent, self.limits, self.verbose)
+        self.blocks_examined, self.ran_out = 0, False
+        for current_block, block in enumerate(blocks):
+            self.blocks_examined = current_block + 1
+            if current_block > 0 and (not block or block[0] == '\n'):
+                if self.next_block is not None and not any(blocks[current_block:]) and scanner.add(self.next_block):
+                    self.verbose('table goes on past the text being converted, where the document has no table')
+                    return 0, [], []
+                break  # double newline or empty block, end the table
+            lines = block.strip('\n').splitlines()
+            if self.tab_lines:
+                lines = [self.tab_lines.get(line, line) for line in lines]  # tabs as written, for display_line
+            if not scanner.add(lines):
+                break  # not a table, if this block is included.
+        else:
+            self.ran_out = True
+        reason = scanner.rejection()
+        if reason:
+            self.verbose(reason)
+            return 0, [], []
+        else:
+            return scanner.blocks, scanner.lines, scanner.cols
+
+    def emit_style(self, parent):
+        if self.style == 'blue':
+            e = etree.SubElement(parent, 'style')
+            e.text = """
+table.columns {
+    font-family: "Times New Roman", Times, serif;
+    border: 1px solid #fff;
+    text-align: center;
+    border-collapse: collapse;
+}
+
+table.columns td,
+table.columns th {
+    border: 1px solid #000;
+    padding: 2px 1px;
+}
+
+table.columns tbody td {
+    font-size: 13px;
+}
+
+table.columns span ul {
+    margin: 0px;
+}
+
+table.columns tr:nth-child(even) {
+    background: #d0e4f5;
+}
+
+table.columns thead {
+    background: #0b6fa4;
+    border: 5px solid #000;
+}
+
+table.columns thead th {
+    font-size: 17px;
+    font-weight: bold;
+    color: #fff;
+    text-align: center;
+    border: 2px solid #000;
+}
+
+
+table.columns tfoot {
+    font-size: 14px;
+    font-weight: bold;
+    color: #333333;
+    background: #D0E4F5;
+    border-top: 3px solid #444444;
+}
+r
+table.columns tfoot td {
+    font-size: 14px;
+    border: 1px solid #000
+}
+"""
+            print("style emitted")
+
+    @staticmethod
+    def check_list(text):
+        #  return is_list, is_ordered, indent, item
+        indent, bullet, ordinal, body = RE_CELL.match(text).groups()
+        if bullet or ordinal:
+            return True, bool(ordinal), len(indent), body.strip()
+        else:
+            return False, False, 0, ''
+
+    def render_table_into_parent(self, parent, table):
+        self.start_table(parent)
+        t_table = etree.SubElement(parent, 'table', {'class': 'columns'})
+        deferred = []
+        for row in self.visible_rows(table, deferred):
+            self.render_row(t_table, table, row)
+        if deferred:
+            self.emit_virtual_rows(parent, table, deferred)
+
+    def start_table(self, parent):
+        """ anything that goes before the first table of the page """
+        if self.was_style_emitted == False:
+            self.emit_style(parent)
+            self.was_style_emitted = True
+
+    def visible_rows(self, table, deferred):
+        """ yield the rows of table to render as HTML, appending to deferred those left to the browser """
+        shown_body_rows = 0
+        for row in table.rows:
+            if row.kind in (Kinds.data, Kinds.blank_sep, Kinds.elided):
+                if self.virtual_rows and shown_body_rows >= self.virtual_rows:
+                    deferred.append(row)
+                    continue
+                shown_body_rows += 1
+            yield row
+
+    def render_row(self, t_table, table, row):
+        html_row(t_table, table, row)
+
+    def emit_virtual_rows(self, parent, table, rows):
+        """ rows of the table just rendered, as JSON with a script to render them as it scrolls """
+        if not self.was_script_emitted:
+            etree.SubElement(parent, 'script').text = AtomicString(VIRTUAL_ROWS_SCRIPT)
+            self.was_script_emitted = True
+        payload = etree.SubElement(parent, 'script', {'type': 'application/json', 'class': 'columns-rows'})
+        payload.text = AtomicString(virtual_rows_payload(table, rows))
+        etree.SubElement(parent, 'script').text = AtomicString('columnsVirtualRows(document.currentScript);')
+
+    def transform_table(self, parent, blocks):
+        """
+        Transform table from blocks, updating parent.  Returns
+        number of blocks used, which may be 0 if not a table.
+        """
+
+        if self.rejections is not None and not self.tab_lines and self.next_block is None:
+            # blocks are keyed after markdown expands tabs, and as the whole rest of the document
+            cached = self.rejections.lookup(blocks, self.context)
+            if cached:
+                reason, examined, is_limit = cached
+                if is_limit:
+                    self.limit_counts[reason] += 1  # counted as if the candidate were scanned again
+                    self.fallback_blocks = blocks[1:examined]
+                return 0
+
+        # transform table
+        num_blocks = 0
+        start = perf_counter()
+        try:
+            (num_blocks, lines, cols) = self.find_table_extent(blocks)
+            if num_blocks > 0:
+                detected = perf_counter()
+                table = self.parse_table(lines, cols)
+                parsed = perf_counter()
+                self.render_table_into_parent(parent, table)
+                if self.slow_log is not None:
+                    self.slow_log.record(lines, cols, table, {'detect': detected - start, 'parse': parsed - detected,
+                                                              'render': perf_counter() - parsed})
+            elif self.scanner.rejection():
+                self.remember_rejection(blocks, self.scanner.rejection())
+            return num_blocks
+        except ColumnsLimitExceeded as e:
+            # the whole candidate falls back, rather than being retried from each of its blocks
+            self.limit_counts[e.limit] += 1
+            if self.slow_log is not None and e.limit == 'time_budget':
+                self.slow_log.record(self.scanner.lines, self.scanner.cols, None,
+                                     {'detect': perf_counter() - start}, e.limit)
+            self.fallback_blocks = blocks[1:num_blocks or self.blocks_examined]
+            self.verbose(str(e))
+            if e.limit != 'time_budget':  # the only limit that depends on more than the text
+                self.remember_rejection(blocks, e.limit, is_limit=True)
+            return 0
+        except ColumnsException as e:
+            self.verbose(str(e))
+            self.remember_rejection(blocks, str(e))
+            return 0  # bail on any problem
+
+    def parse_table(self, lines, cols):
+        """ the RenderedTable of the candidate just found, from self.tables if it was rendered before """
+        key = (tuple(lines), tuple(cols), self.show_rows, self.exact)
+        table = self.tables.get(key) if self.tables is not None else None
+        if table is None:
+            table = RenderedTable.from_table(self.scanner.parse(self.show_rows, self.exact))
+            if self.tables is not None:
+                self.tables.put(key, table)
+        return table
+
+    def transform_include(self, parent, blocks, name):
+        """ render the table of an included CSV or TSV file, or leave the block to markdown """
+        try:
+            path = resolve(self.include_dir, name)
+            self.included.add(path)
+            stat = path.stat()
+            key = (str(path), stat.st_mtime_ns, stat.st_size, self.show_rows, self.exact, self.limits.signature())
+            table = self.includes.get(key) if self.includes is not None else None
+            if table is None:
+                table = RenderedTable.from_table(load_table(path, self.show_rows, self.limits, self.exact))
+                if self.includes is not None:
+                    self.includes.put(key, table)
+        except ColumnsLimitExceeded as e:
+            self.limit_counts[e.limit] += 1
+            self.verbose(f'{name}: {e}')
+            return False
+        except (ColumnsException, OSError, UnicodeDecodeError, csv.Error) as e:
+            self.verbose(f'{name}: {e}')
+            return False
+        self.render_table_into_parent(parent, table)
+        blocks.pop(0)
+
+    def remember_rejection(self, blocks, reason, is_limit=False):
+        if self.rejections is not None and not self.tab_lines and self.next_block is None:
+            self.rejections.store(blocks, self.blocks_examined, self.ran_out, self.context, reason, is_limit)
+
+    def run(self, parent, blocks):
+        """ markdown extension API entry.
+            Blocks are each a multi-line, Unicode string; the whole shebang.split('\n\n')
+        """
+        if self.include_dir:
+            match = RE_INCLUDE.fullmatch(blocks[0].strip())
+            if match:
+                return self.transform_include(parent, blocks, match.group(1))
+        if blocks[0] in self.text_blocks:
+            return False
+        blocks_used = self.transform_table(parent, blocks)
+        if blocks_used == 0:
+            return False  # not a table
+        else:
+            for i in range(blocks_used):
+                blocks.pop(0)
+
+
+class ColumnsTabPreprocessor(Preprocessor):
+    """ Notes the lines with tabs before markdown expands them, leaving the document as it is.
+        ColumnsBlockProcessor looks at table candidates as written, so a tab always separates
+        columns, even after text that ends just short of a tab stop, where markdown leaves one space. """
+
+    def __init__(self, md, processor):
+        super().__init__(md)
+        self.processor = processor
+
+    def run(self, lines):
+        tab_length = self.md.tab_length
+        self.processor.tab_lines = {line.expandtabs(tab_length): line for line in lines if '\t' in line}
+        return lines
+
+
+class ColumnsExtension(Extension):
+    def __init__(self, **kwargs):
+        self.config = {
+            'verbose': [False, 'print extra information to stdout'],
+            'style': ['default', 'style type: default or "blue" table styling'],
+            'max_line_width': [1000, 'longest line, in characters, allowed in a table'],
+            'max_rows': [100_000, 'most lines allowed in a table'],
+            'max_columns': [100, 'most columns allowed in a table'],
+            'max_cells': [1_000_000, 'most cells (rows times columns) allowed in a table'],
+            'time_budget': [2.0, 'seconds allowed to detect and parse one table'],
+            'rejection_cache_size': [1024, 'candidates remembered as not tables, shared by the process; 0 is off'],
+            'show_first_rows': [0, 'show only this many data rows at the top of a big table, 0 for all'],
+            'show_last_rows': [0, 'show only this many data rows at the bottom of a big table, 0 for all'],
+            'virtual_rows': [0, 'render this many body rows as HTML and the rest in the browser on scroll, 0 for all'],
+            'include_dir': ['', 'directory {{table data.csv}} includes are read from, empty for no includes'],
+            'include_cache_size': [64, 'included tables kept by path, mtime and size, shared by the process'],
+            'slow_table_ms': [0, 'log tables taking longer than this to detect, parse and render, 0 is off'],
+            'slow_table_dir': ['', 'directory to keep the source of slow tables in, empty for none'],
+            'slow_table_dir_size': [10_000_000, 'bytes of slow table sources kept, the oldest removed first'],
+            'exact_totals': [False, 'sum columns exactly, keeping their decimal places, rather than as floats']}
+        self.processor = None  # the ColumnsBlockProcessor, once registered
+        super().__init__(**kwargs)
+
+    def get_limits(self):
+        return Limits(**{name: self.getConfig(name)
+                         for name in ('max_line_width', 'max_rows', 'max_columns', 'max_cells', 'time_budget')})
+
+    def get_show_rows(self):
+        first, last = self.getConfig('show_first_rows'), self.getConfig('show_last_rows')
+        return (first, last) if first or last else None
+
+    def get_rejection_cache(self):
+        size = self.getConfig('rejection_cache_size')
+        return RejectionCache.shared(size) if size else None
+
+    def get_include_cache(self):
+        size = self.getConfig('include_cache_size')
+        return IncludeCache.shared(size) if size else None
+
+    def get_slow_log(self):
+        ms = self.getConfig('slow_table_ms')
+        return SlowTableLog(ms / 1000, self.getConfig('slow_table_dir'), self.getConfig('slow_table_dir_size')) \
+            if ms else None
+
+    def reset(self):
+        """ called by Markdown.reset, between documents """
+        if self.processor is not None:
+            self.processor.reset()
+
+    def extendMarkdown(self, md):
+        self.processor = ColumnsBlockProcessor(md.parser,
+                                               verbose=self.getConfig('verbose'),
+                                               style=self.getConfig('style'),
+                                               code_indent=md.tab_length,
+                                               limits=self.get_limits(),
+                                               rejections=self.get_rejection_cache(),
+                                               show_rows=self.get_show_rows(),
+                                               virtual_rows=self.getConfig('virtual_rows'),
+                                               include_dir=self.getConfig('include_dir'),
+                                               includes=self.get_include_cache(),
+                                               slow_log=self.get_slow_log(),
+                                               exact=self.getConfig('exact_totals'))
+        md.parser.blockprocessors.register(self.processor, 'columns', 125)  # run before code block escapes
+        md.registerExtension(self)
+        tabs = ColumnsTabPreprocessor(md, self.processor)
+        md.preprocessors.register(tabs, 'columns_tabs', 35)  # before normalize_whitespace
@@ -0,0 +1,154 @@
+""" Footer templates, compiled once per template text and run against column aggregates.
+
+    A footer cell is literal text and fields.  A field is a placeholder, or placeholders and
+    numbers joined by + - * / (with * and / first) with no spaces around them, and may end with
+    a Python format spec in braces.  An operator after a space is text: '<+> - 5 items' is the
+    total, then ' - 5 items'.
+
+        <+>   <#>   <avg>            total, count and average of the column
+        <+col2>   <avgcol3>          ... of another column, counting from 1
+        <+col2>/<+col1>{.1%}         a ratio, formatted as a percentage
+        <+>-<+col1>                  a difference
+        <%>                          the column filled with percentages of the column to its left
+
+    A field with no numbers to work on, such as an average of nothing, is '--'.
+
+    Totals of tables parsed with exact are Decimals.  Arithmetic on them stays exact, taking
+    numbers in the template as written, except for a division that doesn't come out even,
+    which is done in floats.
+"""
+from decimal import Decimal, Inexact, localcontext
+from functools import lru_cache
+from operator import add, mul, sub
+
+from .patterns import RE_FOOTER_FIELD, RE_FOOTER_TOKEN
+from .util import ColumnsException, num_str
+
+
+def divide(a, b):
+    """ a / b, as a Decimal if that is exact, else a float """
+    if isinstance(a, Decimal) or isinstance(b, Decimal):
+        with localcontext() as context:
+            context.traps[Inexact] = True
+            try:
+                return a / b
+            except Inexact:
+                pass
+        return float(a) / float(b)
+    return a / b
+
+
+def as_decimal(number):
+    """ a float, such as a number in a template, as a Decimal of its shortest digits: 2.0 is 2, 1.1 is 1.1 """
+    return Decimal(int(number)) if number.is_integer() else Decimal(repr(number))
+
+
+OPERATORS = {'+': add, '-': sub, '*': mul, '/': divide}
+PRECEDENCE = {'+': 1, '-': 1, '*': 2, '/': 2}
+
+
+def aggregate(op, col):
+    """ evaluator of one placeholder: function(columns, cell_num) -> number or None """
+    def column(columns, cell_num):
+        if col is None:
+            return columns[cell_num]
+        if not 0 <= col < len(columns):
+            raise ColumnsException(f'Footer refers to column {col + 1} of {len(columns)}')
+        return columns[col]
+
+    if op == '+':
+        return lambda columns, cell_num: column(columns, cell_num).total
+    elif op == '#':
+        return lambda columns, cell_num: column(columns, cell_num).count
+
+    def average(columns, cell_num):
+        c = column(columns, cell_num)
+        return divide(c.total, c.numbers) if c.numbers else None
+    return average
+
+
+def binary(op, left, right):
+    function = OPERATORS[op]
+
+    def evaluate(columns, cell_num):
+        a, b = left(columns, cell_num), right(columns, cell_num)
+        if a is None or b is None or (op == '/' and not b):
+            return None
+        if isinstance(a, Decimal) and isinstance(b, float):
+            b = as_decimal(b)
+        elif isinstance(b, Decimal) and isinstance(a, float):
+            a = as_decimal(a)
+        return function(a, b)
+    return evaluate
+
+
+def compile_expression(text):
+    """ evaluator of placeholders and numbers joined by operators, by precedence climbing """
+    operands, operators = [], []
+    for op, col, number, operator in RE_FOOTER_TOKEN.findall(text):
+        if operator:
+            while operators and PRECEDENCE[operators[-1]] >= PRECEDENCE[operator]:
+                right = operands.pop()
+                operands.append(binary(operators.pop(), operands.pop(), right))
+            operators.append(operator)
+        elif number:
+            operands.append(lambda columns, cell_num, value=float(number): value)
+        else:
+            operands.append(aggregate(op, int(col) - 1 if col else None))
+    while operators:
+        right = operands.pop()
+        operands.append(binary(operators.pop(), operands.pop(), right))
+    return operands[0]
+
+
+class Field:
+    def __init__(self, text, spec):
+        self.spec = spec
+        self.is_percent = text == '<%>'
+        if '<%' in text and not self.is_percent:
+            raise ColumnsException(f'<%> stands alone, not in {text}')
+        self.evaluate = None if self.is_percent else compile_expression(text)
+        if spec is not None:
+            try:
+                format(1.0, spec)
+            except ValueError:
+                raise ColumnsException(f'Bad footer format {{{spec}}}') from None
+
+    def render(self, table, cell_num):
+        if self.is_percent:
+            return table.calc_percentage(cell_num)
+        value = self.evaluate(table.columns, cell_num)
+        if value is None:
+            return '--'
+        if self.spec is None:
+            return num_str(value)
+        if isinstance(value, int):
+            value = float(value)  # a count, or an exact total of 0, takes the specs a float does
+        try:
+            return format(value, self.spec)
+        except ValueError:
+            raise ColumnsException(f'Bad footer format {{{self.spec}}} for {value}') from None
+
+
+class FooterTemplate:
+    """ a footer cell's text as literal text and Fields """
+
+    def __init__(self, text):
+        self.parts = []
+        end = 0
+        for m in RE_FOOTER_FIELD.finditer(text):
+            if m.start() > end:
+                self.parts.append(text[end:m.start()])
+            self.parts.append(Field(m.group(1), m.group(2)))
+            end = m.end()
+        if end < len(text):
+            self.parts.append(text[end:])
+
+    def render(self, table, cell_num):
+        return ''.join(part if isinstance(part, str) else part.render(table, cell_num) for part in self.parts)
+
+
+@lru_cache(maxsize=1024)
+def compile_footer(text):
+    """ the FooterTemplate of a footer cell's text, compiled once for every table using it """
+    return FooterTemplate(text)
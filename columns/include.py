@@ -0,0 +1,70 @@
+""" Tables included from CSV and TSV files, with a block of just {{table data.csv}}.
+
+    The first row of the file is the header.  A last row with <+>, <#>, <avg> or <%> is the footer,
+    and a row of empty cells is a blank separator, just as in a table written in the document.
+    The cells go straight into a Table in one pass, with no layout to lex, so a data cell is just text:
+    '- pending' is not a list item, and '<+>' is not a placeholder.  Only footer cells are calculated.
+"""
+import codecs
+import csv
+import mmap
+from pathlib import Path
+
+from .scan import Limits
+from .table import Table
+from .util import ColumnsException
+
+MMAP_SIZE = 1 << 20  # files this big are memory mapped rather than read through a buffer
+DELIMITERS = {'.tsv': '\t', '.tab': '\t'}  # by suffix; anything else is comma separated
+
+
+def resolve(include_dir, name):
+    """ the path of an included file, which must be inside include_dir """
+    base = Path(include_dir).resolve()
+    path = (base / name).resolve()
+    if base != path and base not in path.parents:
+        raise ColumnsException(f'Include {name} is outside {include_dir}')
+    if not path.is_file():
+        raise ColumnsException(f'Include {name} not found')
+    return path
+
+
+def iter_lines(path):
+    """ yield the text lines of a file, memory mapped if it is big, without any byte order mark """
+    if path.stat().st_size < MMAP_SIZE:
+        with open(path, encoding='utf-8-sig', newline='') as f:
+            yield from f
+        return
+    decoder = codecs.getincrementaldecoder('utf-8-sig')()
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        for line in iter(mm.readline, b''):
+            yield decoder.decode(line)
+    decoder.decode(b'', final=True)
+
+
+def read_rows(path, limits):
+    """ cell texts of each row of a CSV or TSV file, checked against limits as they are read """
+    lines = iter_lines(path)
+    reader = csv.reader(lines, delimiter=DELIMITERS.get(path.suffix.lower(), ','))
+    rows, cells = [], 0
+    for row in reader:
+        row = [' '.join(cell.split()) for cell in row]  # no newlines, and no runs of spaces
+        rows.append(row)
+        cells += len(row)
+        limits.check('max_line_width', sum(map(len, row)) + 2 * (len(row) - 1))  # as if laid out in columns
+        limits.check('max_rows', len(rows))
+        limits.check('max_columns', len(row))
+        limits.check('max_cells', cells)
+    return rows
+
+
+def load_table(path, show_rows=None, limits=None, exact=False):
+    """ the Table of a CSV or TSV file """
+    rows = read_rows(Path(path), limits or Limits())
+    while rows and not any(rows[-1]):
+        rows.pop()  # trailing blank lines
+    if len(rows) < 2:
+        raise ColumnsException(f'Include {path} has too few rows')
+    if max(map(len, rows)) < 2:
+        raise ColumnsException(f'Include {path} needs at least two columns')
+    return Table.from_rows(rows, show_rows, exact)
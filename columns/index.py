@@ -0,0 +1,151 @@
+""" Random access to the tables of huge markdown files, through a sidecar index.
+
+    build_index memory maps a file and scans it once with scan_document, the rules of
+    ColumnsBlockProcessor, writing FILE.tables.json beside it: for each table, the byte offset
+    and size of its lines, the line it starts on, its line count, column stops and header.
+    TableIndex.open reads the index, building it again if the file has changed since, and
+    parses or renders any one table by reading only that table's bytes.
+"""
+import json
+import mmap
+import os
+import re
+from collections import deque
+from pathlib import Path
+
+from .emit import RenderedTable
+from .scan import display_line, normalize_lines, scan_document
+from .table import Kinds, Table
+from .util import ColumnsException
+
+INDEX_VERSION = 1
+INDEX_SUFFIX = '.tables.json'
+
+
+def index_path(path):
+    path = Path(path)
+    return path.with_name(path.name + INDEX_SUFFIX)
+
+
+def source_stamp(path):
+    st = os.stat(path)
+    return {'size': st.st_size, 'mtime_ns': st.st_mtime_ns}
+
+
+class IndexEntry:
+    """ where one table is in the file """
+    __slots__ = ('offset', 'size', 'line', 'lines', 'cols', 'header')
+
+    def __init__(self, offset, size, line, lines, cols, header):
+        self.offset = offset  # byte offset of the first line
+        self.size = size  # bytes, through the end of the last line
+        self.line = line  # line number of the first line, from 0
+        self.lines = lines
+        self.cols = cols  # [(start, end)] column stops, in display columns
+        self.header = header  # cell texts of the header row, or None
+
+    def to_json(self):
+        return [self.offset, self.size, self.line, self.lines, self.cols, self.header]
+
+    @classmethod
+    def from_json(cls, record):
+        offset, size, line, lines, cols, header = record
+        return cls(offset, size, line, lines, [tuple(col) for col in cols], header)
+
+
+def scan_entries(mm, tab_length=4, limits=None):
+    """ yield an IndexEntry for each table in a memory mapped file.  Byte offsets are kept only
+        for the lines scan_document is still holding, so memory is bounded by the largest table. """
+    offsets = deque()  # byte offset of line base, base + 1, ...
+    base = 0
+
+    def lines():
+        offset = 0
+        for raw in iter(mm.readline, b''):
+            offsets.append(offset)
+            offset += len(raw)
+            yield raw.decode('utf-8')
+        offsets.append(offset)  # the end of the file, after the last line
+
+    for segment in scan_document(lines(), tab_length, limits):
+        if segment.table is not None:
+            start, end = offsets[segment.start - base], offsets[segment.end - base]
+            header = segment.table.rows[0]
+            yield IndexEntry(start, end - start, segment.start, len(segment.lines), segment.cols,
+                             [c.text for c in header.cells] if header.kind == Kinds.header else None)
+        while base < segment.end:
+            offsets.popleft()
+            base += 1
+
+
+def build_index(path, tab_length=4, limits=None):
+    """ scan a markdown file and write its index beside it; returns the TableIndex """
+    path = Path(path)
+    stamp = source_stamp(path)
+    with open(path, 'rb') as f:
+        if stamp['size']:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                entries = list(scan_entries(mm, tab_length, limits))
+        else:
+            entries = []  # an empty file can't be memory mapped
+    out = index_path(path)
+    temp = out.with_name(out.name + '.tmp')
+    with open(temp, 'w', encoding='utf-8') as f:
+        json.dump({'version': INDEX_VERSION, 'source': stamp, 'tab_length': tab_length,
+                   'tables': [entry.to_json() for entry in entries]}, f, separators=(',', ':'))
+    os.replace(temp, out)  # readers see the old index or the new one, never part of one
+    return TableIndex(path, entries, tab_length)
+
+
+class TableIndex:
+    """ The tables of a markdown file, found by number or by header, each read on its own """
+
+    def __init__(self, path, entries, tab_length=4):
+        self.path = Path(path)
+        self.entries = entries
+        self.tab_length = tab_length
+
+    @classmethod
+    def open(cls, path, tab_length=4, limits=None):
+        """ the index of a file, from its sidecar if that is up to date, else built again """
+        try:
+            with open(index_path(path), encoding='utf-8') as f:
+                data = json.load(f)
+            if data['version'] == INDEX_VERSION and data['source'] == source_stamp(path) and \
+                    data['tab_length'] == tab_length:
+                return cls(path, [IndexEntry.from_json(record) for record in data['tables']], tab_length)
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+        return build_index(path, tab_length, limits)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def find(self, header):
+        """ number of the first table with a header matching header, a regular expression searched
+            in the header's cells joined by two spaces, or None """
+        pattern = re.compile(header)
+        for n, entry in enumerate(self.entries):
+            if entry.header is not None and pattern.search('  '.join(entry.header)):
+                return n
+        return None
+
+    def lines(self, n):
+        """ the lines of table n, as scan_document saw them """
+        entry = self.entries[n]
+        with open(self.path, 'rb') as f:
+            f.seek(entry.offset)
+            data = f.read(entry.size)
+        lines = list(normalize_lines(data.decode('utf-8').split('\n')[:entry.lines]))
+        if len(lines) != entry.lines:
+            raise ColumnsException(f'{self.path} changed since it was indexed')
+        return lines
+
+    def table(self, n, show_rows=None):
+        """ the Table of table n """
+        entry = self.entries[n]
+        return Table([display_line(line, self.tab_length) for line in self.lines(n)], entry.cols, show_rows)
+
+    def render(self, n, format_='html', show_rows=None, **options):
+        """ table n in any emitter's format """
+        return RenderedTable.from_table(self.table(n, show_rows)).emit(format_, **options)
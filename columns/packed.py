@@ -0,0 +1,185 @@
+""" A compact, versioned binary form of a parsed table, for passing between processes and for caches.
+
+    pack_table(table) gives bytes; PackedTable(buffer) reads them in place and renders with any
+    emitter, as a RenderedTable does.  Little-endian, each section starting on 8 bytes:
+
+        header     magic, version, number of rows and columns, size of the string blob
+        align      a byte per column: Align
+        types      a byte per column: ColumnType
+        kinds      a byte per row: Kinds
+        lists      a byte per cell: list depth, plus 128 if ordered; 0 if not a list item
+        sequences  a uint32 per cell: the number of an ordered list item
+        offsets    a uint32 per string and one more: rows' texts, then cells' texts row by row
+        numbers    for each numeric column, a double per row, then a valid byte per row
+        blob       the strings, UTF-8
+
+    Elided rows have no cells; their cells are packed as empty strings and read back as none.
+"""
+import struct
+import sys
+from array import array
+
+from .emit import RenderedCell, RenderedRow, RenderedTable
+from .table import NUMERIC_TYPES, Align, ColumnType, Kinds, ListInfo
+from .util import ColumnsException
+
+PACK_MAGIC = b'COLT'
+PACK_VERSION = 1
+HEADER = struct.Struct('<4sHHIII')  # magic, version, reserved, rows, columns, blob size
+ORDERED = 128
+IS_BIG_ENDIAN = sys.byteorder == 'big'
+
+
+def padded(size):
+    return (size + 7) & ~7
+
+
+def little_endian(items):
+    """ an array's bytes in little-endian order """
+    if IS_BIG_ENDIAN:
+        items = array(items.typecode, items)
+        items.byteswap()
+    return items.tobytes()
+
+
+def pack_table(table):
+    """ bytes of a parsed Table, with its calculated fields filled in """
+    num_cols = len(table.col_alignment)
+    rows = table.rows
+    lists, sequences, valid = bytearray(), array('I'), []
+    strings = [row.text for row in rows]
+    numeric = [c_i for c_i, type_ in enumerate(table.col_types) if type_ in NUMERIC_TYPES]
+    values = array('d', bytes(8 * len(rows) * len(numeric)))
+    for row in rows:
+        cells = row.cells if row.kind != Kinds.elided else ()
+        for cell in cells:
+            strings.append(cell.text)
+            list_ = cell.list_
+            if list_ and list_.depth >= ORDERED:
+                raise ColumnsException(f'List depth {list_.depth} is too deep to pack, the most is {ORDERED - 1}')
+            lists.append(list_.depth | (ORDERED if list_.is_ordered else 0) if list_ else 0)
+            sequences.append(list_.order_sequence if list_ else 0)
+        for _ in range(num_cols - len(cells)):
+            strings.append('')
+            lists.append(0)
+            sequences.append(0)
+    for n, c_i in enumerate(numeric):
+        column_valid = bytearray(len(rows))
+        for r_i, row in enumerate(rows):
+            if row.kind != Kinds.elided and row.cells[c_i].value is not None:
+                values[n * len(rows) + r_i] = row.cells[c_i].value
+                column_valid[r_i] = 1
+        valid.append(column_valid)
+
+    encoded = [s.encode('utf-8') for s in strings]
+    offsets, end = array('I', [0]), 0
+    for s in encoded:
+        end += len(s)
+        offsets.append(end)
+    blob = b''.join(encoded)
+
+    sections = [bytes(table.col_alignment), bytes(table.col_types), bytes(row.kind for row in rows), bytes(lists),
+                little_endian(sequences), little_endian(offsets)]
+    for n in range(len(numeric)):
+        sections.append(little_endian(values[n * len(rows):(n + 1) * len(rows)]))
+        sections.append(bytes(valid[n]))
+    sections.append(blob)
+    out = bytearray(HEADER.pack(PACK_MAGIC, PACK_VERSION, 0, len(rows), num_cols, len(blob)))
+    for section in sections:
+        out += bytes(padded(len(out)) - len(out))
+        out += section
+    return bytes(out)
+
+
+class PackedRows:
+    """ the rows of a PackedTable, as RenderedRows made when they are read """
+
+    def __init__(self, packed):
+        self.packed = packed
+
+    def __len__(self):
+        return self.packed.num_rows
+
+    def __getitem__(self, r_i):
+        if isinstance(r_i, slice):
+            return [self[i] for i in range(*r_i.indices(len(self)))]
+        if r_i < 0:
+            r_i += len(self)
+        if not 0 <= r_i < len(self):
+            raise IndexError(r_i)
+        return self.packed.row(r_i)
+
+    def __iter__(self):
+        return (self.packed.row(r_i) for r_i in range(len(self)))
+
+
+class PackedTable(RenderedTable):
+    """ A table read in place from pack_table's bytes.  Renders as a RenderedTable does, decoding
+        each string when its row is read.  values and valid give numeric columns without copying. """
+
+    def __init__(self, buffer):
+        view = memoryview(buffer).cast('B')
+        if len(view) < HEADER.size:
+            raise ColumnsException('Packed table is truncated')
+        magic, version, _, self.num_rows, num_cols, blob_size = HEADER.unpack_from(view)
+        if magic != PACK_MAGIC:
+            raise ColumnsException('Not a packed table')
+        if version != PACK_VERSION:
+            raise ColumnsException(f'Packed table version {version}, not {PACK_VERSION}')
+        num_rows, num_cells = self.num_rows, self.num_rows * num_cols
+        at = padded(HEADER.size)
+
+        def section(size, format_='B'):
+            nonlocal at
+            start, end = at, at + size * struct.calcsize(format_)
+            if end > len(view):
+                raise ColumnsException('Packed table is truncated')
+            part, at = view[start:end], padded(end)
+            if format_ == 'B':
+                return part
+            if IS_BIG_ENDIAN:
+                items = array(format_, part)
+                items.byteswap()
+                return memoryview(items)
+            return part.cast(format_)
+
+        alignment = section(num_cols)
+        self.col_types = [ColumnType(t) for t in section(num_cols)]
+        self.kinds = section(num_rows)
+        self.lists = section(num_cells)
+        self.sequences = section(num_cells, 'I')
+        self.offsets = section(num_rows + num_cells + 1, 'I')
+        self.numbers = {}  # column index -> (values, valid)
+        for c_i, type_ in enumerate(self.col_types):
+            if type_ in NUMERIC_TYPES:
+                self.numbers[c_i] = (section(num_rows, 'd'), section(num_rows))
+        self.blob = section(blob_size)
+        if self.offsets[-1] != blob_size:
+            raise ColumnsException('Packed table strings are corrupt')
+        super().__init__([Align(a) for a in alignment], PackedRows(self))
+
+    def string(self, i):
+        return str(self.blob[self.offsets[i]:self.offsets[i + 1]], 'utf-8')
+
+    def row(self, r_i):
+        kind = Kinds(self.kinds[r_i])
+        cells = []
+        if kind != Kinds.elided:
+            num_cols = self.num_columns
+            first = r_i * num_cols
+            for i in range(first, first + num_cols):
+                list_ = None
+                if self.lists[i]:
+                    list_ = ListInfo(0, bool(self.lists[i] & ORDERED))
+                    list_.depth = self.lists[i] & ~ORDERED
+                    list_.order_sequence = self.sequences[i]
+                cells.append(RenderedCell(self.string(self.num_rows + i), list_))
+        return RenderedRow(kind, self.string(r_i), cells)
+
+    def values(self, c_i):
+        """ memoryview of a double per row for a numeric column, 0.0 where not valid, or None """
+        return self.numbers[c_i][0] if c_i in self.numbers else None
+
+    def valid(self, c_i):
+        """ memoryview of a byte per row, 1 where a numeric column has a number, or None """
+        return self.numbers[c_i][1] if c_i in self.numbers else None
@@ -0,0 +1,48 @@
+""" Precompiled patterns, shared by the lexer, the column typer and table detection. """
+import re
+
+# Cells: each cell is matched once by RE_CELL; the rest is classified with string methods on the body.
+RE_CELL = re.compile(r'(\s*)(?:(?:([-*+])|(\d+)\.)\s+)?(.*)')  # indent, bullet, ordinal, body
+RE_PLACEHOLDER = re.compile(r'<(\+|-|%|#|avg)(?:col\d+)?>')
+RE_IGNORABLE = re.compile(r'(?i)\s*(?:n/?a|-+)?\s*')
+NUMBER = r'[^\S\n]*[+-]?(?:(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?|(?i:inf(?:inity)?|nan))[^\S\n]*'  # as float() takes
+RE_NUMBER = re.compile(NUMBER)
+RE_NUMBER_LINES = re.compile(f'^(?:({NUMBER})|.*)$', re.MULTILINE)  # one match per line, group 1 if a number
+NUMBER_CRUFT_CHARS = '* ,$_%'
+NUMBER_CRUFT = str.maketrans('', '', NUMBER_CRUFT_CHARS)
+SEPARATOR_CHARS = '#=-_+'
+DECORATION_CHARS = '*_'
+
+# Footer templates: fields are a placeholder, or placeholders and numbers joined by + - * / with no spaces,
+# so text after a placeholder, like '<+> - 5 items', stays text; then a {format}
+FOOTER_PLACEHOLDER = r'<(?:\+|%|#|avg)(?:col\d+)?>'
+RE_FOOTER_FIELD = re.compile(rf'({FOOTER_PLACEHOLDER}(?:[-+*/](?:{FOOTER_PLACEHOLDER}|\d+(?:\.\d+)?))*)'
+                             r'(?:\{([^{}]*)\})?')
+RE_FOOTER_TOKEN = re.compile(r'<(\+|%|#|avg)(?:col(\d+))?>|(\d+(?:\.\d+)?)|([-+*/])')
+
+# Header directives: <sort>, <sort desc>, <top 10>
+RE_DIRECTIVE = re.compile(r'\s*<(sort|top)(?:\s+(asc|desc|\d+))?>\s*')
+
+# Column types
+RE_DATE = re.compile(r'\d{4}-\d{1,2}-\d{1,2}|\d{1,2}/\d{1,2}/(?:\d{2}|\d{4})')
+
+# Table detection
+RE_NOT_SPACE = re.compile(r'[^ ]')
+FILL = '\x00'  # follows each double width character in display lines, so indexes are display columns
+RE_TWO_SPACES = re.compile(r'\S {2,}\S')  # a block needs two or more spaces between text to be a table
+
+# Fenced code and raw html, which markdown takes out of a document before it looks for tables
+RE_FENCE_OPEN = re.compile(r'(~{3,}|`{3,}) *(?:\{[^\n]*\}|\.?[\w#.+-]* *(?:hl_lines=("|\').*?\2 *)?)')  # as fenced_code
+RE_HTML_TAG = re.compile(r'<(/?)([a-zA-Z][a-zA-Z0-9-]*)(?:\s[^>]*?)?(/?)>')  # end, name, self closing
+BLOCK_TAGS = frozenset(['address', 'article', 'aside', 'blockquote', 'details', 'div', 'dl', 'fieldset', 'figcaption',
+                        'figure', 'footer', 'form', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'header', 'hgroup', 'hr',
+                        'main', 'menu', 'nav', 'ol', 'p', 'pre', 'section', 'table', 'ul', 'canvas', 'colgroup', 'dd',
+                        'body', 'dt', 'group', 'html', 'iframe', 'li', 'legend', 'math', 'map', 'noscript', 'output',
+                        'object', 'option', 'progress', 'script', 'style', 'summary', 'tbody', 'td', 'textarea',
+                        'tfoot', 'th', 'thead', 'tr', 'video', 'center'])  # Markdown.block_level_elements
+
+# Includes
+RE_INCLUDE = re.compile(r'\{\{table\s+(.+?)\s*\}\}')  # a block of just {{table data.csv}}
+
+# Streaming output
+RE_FENCE = re.compile(r' {0,3}(?:```|~~~)')  # fenced code, which may hold blank lines
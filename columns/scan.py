@@ -0,0 +1,400 @@
+""" Table detection: which lines of a document make a table, and where its columns are.
+    Nothing here needs Python-Markdown. """
+import unicodedata
+from collections import deque
+from time import perf_counter
+
+from .patterns import BLOCK_TAGS, FILL, RE_FENCE_OPEN, RE_HTML_TAG, RE_NOT_SPACE, RE_TWO_SPACES
+from .table import Table, cluster_char
+from .util import ColumnsException, ColumnsLimitExceeded, debug_update_spaces_print, null
+
+
+class Limits:
+    """ Hard limits on the size and cost of a single table.  A table over any limit is left
+        alone, so markdown renders it as paragraphs or code.  None turns a limit off. """
+
+    def __init__(self, max_line_width=1000, max_rows=100_000, max_columns=100, max_cells=1_000_000,
+                 time_budget=2.0):
+        self.max_line_width = max_line_width
+        self.max_rows = max_rows
+        self.max_columns = max_columns
+        self.max_cells = max_cells
+        self.time_budget = time_budget  # seconds, per table
+
+    def signature(self):
+        return self.max_line_width, self.max_rows, self.max_columns, self.max_cells, self.time_budget
+
+    def check(self, limit, value):
+        bound = getattr(self, limit)
+        if bound is not None and value > bound:
+            raise ColumnsLimitExceeded(limit, value, bound)
+
+    def deadline(self, elapsed):
+        """ perf_counter() value when the time budget runs out, given the time already used """
+        return None if self.time_budget is None else perf_counter() + self.time_budget - elapsed
+
+
+def get_columns(spaces, gaps=()):
+    """ look at array of boolean spaces and return list a (start, end+1) of each
+        actual column of False (non-blank), which has two or more spaces
+        from next actual text column, excepting the ends.  A space at an index in gaps,
+        where a tab is, separates columns by itself.
+
+        That is, a column of non-spaces is a span of False values with no more than
+        one True value between them.
+
+        a string s like 'A  AA A ', has spaces [f,t,t,f,f, t,f,t],
+        so columns of (0,1), (3,7), with s[0:1] == 'A' and s[3:7] == 'AA A'
+        returns list of tuples of text columns
+    """
+    deb_string = ''.join([('A' if not sp else '_') for sp in spaces])
+    text_cols = []
+    # states:  0 = not in word (in blank column), 1 = in word, last was character, 2 = in word, last was space
+    state_in_blanks, state_in_word, state_saw_one_space = 0, 1, 2
+    state = state_in_blanks
+    begin_word, end_word = None, None
+    for i, space in enumerate(spaces):
+        if state == state_in_blanks and not space:
+            begin_word = i
+            state = state_in_word
+        elif state == state_in_word and space and i in gaps:
+            text_cols.append((begin_word, i))
+            state = state_in_blanks
+            begin_word, end_word = None, None
+        elif state == state_in_word and space:
+            end_word = i  # but we won't know until next space
+            state = state_saw_one_space
+        elif state == state_saw_one_space and space:  # double spaced
+            text_cols.append((begin_word, end_word))
+            state = state_in_blanks
+            begin_word, end_word = None, None
+        elif state == state_saw_one_space and not space:
+            state = state_in_word
+    # end of string
+    if state == state_saw_one_space:
+        text_cols.append((begin_word, end_word))  # like, '  ff '
+    elif state == state_in_word:
+        text_cols.append((begin_word, len(spaces)))  # like, '  ff'
+    return text_cols
+
+
+WIDTHS = {}  # character -> display width, 0, 1 or 2, filled in as characters are seen
+
+
+def char_width(ch):
+    width = WIDTHS.get(ch)
+    if width is None:
+        if unicodedata.category(ch) in ('Mn', 'Me'):
+            width = 0  # a combining mark, drawn over the character before it
+        else:
+            width = 2 if unicodedata.east_asian_width(ch) in 'WF' else 1
+        WIDTHS[ch] = width
+    return width
+
+
+def expand_tabs(line, tab_length=4, gaps=None):
+    """ line with tabs replaced by spaces to the next tab stop, counting display columns.
+        The display column where each tab starts is added to the set gaps, if given, for get_columns
+        to take as a column gap even when the tab is a single space. """
+    if '\t' not in line:
+        return line
+    out, col = [], 0
+    for ch in line:
+        if ch == '\t':
+            pad = tab_length - col % tab_length
+            if gaps is not None:
+                gaps.add(col)
+            out.append(' ' * pad)
+            col += pad
+        else:
+            out.append(ch)
+            col += 1 if ch.isascii() else char_width(ch)
+    return ''.join(out)
+
+
+def display_line(line, tab_length=4, gaps=None):
+    """ line with tabs expanded, FILL after each double width character, and each character with
+        combining marks as one character from cluster_char, so an index into it is a display column.
+        TableRow gets the text as written back.  Pure ASCII lines without tabs are returned as they are.
+        gaps is as for expand_tabs. """
+    line = expand_tabs(line, tab_length, gaps)
+    if line.isascii():
+        return line
+    widths = [1 if ch.isascii() else char_width(ch) for ch in line]
+    if 0 not in widths:
+        return ''.join(ch + FILL if width == 2 else ch for ch, width in zip(line, widths))
+    clusters = []  # [text, width]
+    for ch, width in zip(line, widths):
+        if not width and clusters and clusters[-1][0] != ' ':
+            clusters[-1][0] += ch
+        else:
+            clusters.append([ch, width or 1])
+    return ''.join((text if len(text) == 1 else cluster_char(text)) + FILL * (width - 1) for text, width in clusters)
+
+
+SPACE_BITS = bytes.maketrans(bytes(range(256)), b'1' * 32 + b'0' + b'1' * 223)  # ASCII line to '0' at each space
+
+
+def update_spaces_in_lines(lines, spaces, deadline=None):
+    """
+    returns list booleans the max(len(lines), len(spaces)), with true
+       meaning both lines and spaces (or just one if only one in length) has a space.
+       Raises ColumnsLimitExceeded if perf_counter() passes deadline.
+
+    The columns with text are kept as bits of an int, bit i for column i, so each line
+    is folded in with a regex substitution and an or rather than a loop over characters.
+    """
+    width = len(spaces)
+    text = int(''.join('0' if space else '1' for space in reversed(spaces)) or '0', 2)
+    for line in lines:
+        if deadline is not None and perf_counter() > deadline:
+            raise ColumnsLimitExceeded('time_budget', perf_counter() - deadline, 0)
+        if line:
+            width = max(width, len(line))
+            if line.isascii():
+                bits = line.encode('ascii').translate(SPACE_BITS)
+            else:
+                bits = RE_NOT_SPACE.sub('1', line).replace(' ', '0')
+            text |= int(bits[::-1], 2)
+    spaces = [bit == '0' for bit in bin(text)[:1:-1].ljust(width, '0')[:width]]
+    debug_update_spaces_print('\n'.join(lines))
+    debug_update_spaces_print(''.join(['-' if space else 'A' for space in spaces]))
+    return spaces
+
+
+class TableScanner:
+    """ The table detection rules, fed one block at a time.  A block is added only if the
+        table still has two or more columns, not indented as code, with it included. """
+
+    def __init__(self, code_indent, limits=None, verbose=null):
+        self.code_indent = code_indent
+        self.limits = limits or Limits()
+        self.verbose = verbose
+        self.spaces = []  # List[Bool], true if table has all spaces in this column
+        self.lines = []  # lines known to be part of a table
+        self.display_lines = []  # ... as display_line, which the columns index
+        self.cols = []
+        self.gaps = set()  # display columns where a line has a tab, which get_columns takes as gaps
+        self.blocks = 0  # blocks used to make lines
+        self.elapsed = 0.0  # seconds spent on this table, for the time budget
+
+    def add(self, block_lines):
+        """ returns True if the block extends the table, else False and the table is unchanged.
+            Raises ColumnsLimitExceeded if the block would put the table over a limit.  Limits are
+            checked only once the block is known to extend the table; the time budget bounds the
+            work of finding that out. """
+        start = perf_counter()
+        lines = [''] + block_lines if self.blocks else block_lines  # separator for blank table line
+        gaps = set(self.gaps)
+        display_lines = [display_line(line, self.code_indent, gaps) for line in lines]
+        limits = self.limits
+        spaces = update_spaces_in_lines(display_lines, self.spaces, limits.deadline(self.elapsed))
+        cols = get_columns(spaces, gaps)
+        self.elapsed += perf_counter() - start
+        if len(cols) < 2:
+            return False  # not part of the table, however big, such as a long paragraph after it
+        if cols[0][0] >= self.code_indent:
+            self.verbose(f'block #{self.blocks}.  Table starts too far in and is a code block')
+            return False
+        limits.check('max_rows', len(self.lines) + len(lines))
+        limits.check('max_line_width', max(map(len, display_lines), default=0))
+        limits.check('max_columns', len(cols))
+        limits.check('max_cells', len(cols) * (len(self.lines) + len(lines)))
+        self.spaces, self.cols, self.gaps = spaces, cols, gaps
+        self.lines.extend(lines)
+        self.display_lines.extend(display_lines)
+        self.blocks += 1
+        return True
+
+    def rejection(self):
+        """ reason the blocks added so far are not a table, or None if they are """
+        if len(self.cols) < 2:
+            return 'Need at least two columns'
+        elif len(self.lines) < 2:
+            return 'Table too short'
+        return None
+
+    def parse(self, show_rows=None, exact=False):
+        """ the Table of the lines added, giving up if it runs over the time budget """
+        start = perf_counter()
+        table = Table(self.display_lines, self.cols, show_rows, exact, self.limits.deadline(self.elapsed))
+        self.elapsed += perf_counter() - start
+        self.limits.check('time_budget', self.elapsed)
+        return table
+
+
+class Segment:
+    """ A run of document lines from scan_document: one table, or one block of other text """
+
+    def __init__(self, start, lines, table=None, cols=None, verbatim=None):
+        self.start = start  # line number of the first line
+        self.end = start + len(lines)  # line number after the last line
+        self.lines = lines
+        self.table = table
+        self.cols = cols
+        self.verbatim = verbatim  # Verbatim of fenced code or raw html, else None
+
+
+def normalize_lines(lines):
+    """ yield lines as markdown sees them: no line endings, blank lines empty.  Tabs are kept, for
+        display_line to expand in tables and markdown everywhere else. """
+    for line in lines:
+        line = line.rstrip('\r\n')
+        yield line if line.strip(' \t') else ''
+
+
+class Verbatim:
+    """ Fenced code, an html comment or a raw html block, fed a line at a time from its first
+        until the line that closes it, as markdown's fenced_code and html block extractor find them. """
+
+    def __init__(self, fence=None, is_comment=False):
+        self.fence = fence  # the line that closes fenced code
+        self.is_comment = is_comment
+        self.stack = []  # open tags of raw html
+        self.lines = 0
+
+    @classmethod
+    def start(cls, line, fences=False, block_tags=()):
+        """ the Verbatim that line opens, or None """
+        if fences and RE_FENCE_OPEN.fullmatch(line):
+            return cls(fence=RE_FENCE_OPEN.match(line).group(1))
+        stripped = line.lstrip(' ')
+        if not block_tags or not stripped.startswith('<') or len(line) - len(stripped) > 3:
+            return None
+        if stripped.startswith('<!--'):
+            return cls(is_comment=True)
+        m = RE_HTML_TAG.match(stripped)
+        return cls() if m and not m.group(1) and m.group(2).lower() in block_tags else None
+
+    @property
+    def is_html(self):
+        return self.fence is None and not self.is_comment
+
+    def feed(self, line):
+        """ True if line closes it """
+        self.lines += 1
+        if self.fence is not None:
+            return self.lines > 1 and line.rstrip(' ') == self.fence
+        if self.is_comment:
+            return '-->' in (line[line.index('<!--') + 4:] if self.lines == 1 else line)
+        for m in RE_HTML_TAG.finditer(line):
+            is_end, tag, is_empty = m.group(1), m.group(2).lower(), m.group(3)
+            if is_end:
+                while tag in self.stack and self.stack.pop() != tag:
+                    pass
+            elif not is_empty and tag != 'hr':
+                self.stack.append(tag)
+            if not self.stack:
+                return True
+        return False
+
+
+def split_blocks(lines, fences=False, block_tags=()):
+    """ yield (start, lines, gap, verbatim) for each block of lines between blank lines,
+        where gap is the number of blank lines before the block.  With fences, fenced code, and
+        with block_tags, raw html blocks and comments are blocks of their own, blank lines and all,
+        with their Verbatim, else None: markdown takes them out before it looks for tables.  Unclosed
+        fences and comments are text, and an unclosed html block runs to the end, as in markdown. """
+    block, start, gap = [], 0, 0
+    verbatim = None
+    for line_num, line in enumerate(lines):
+        if verbatim is None and line and (fences or block_tags):
+            verbatim = Verbatim.start(line, fences, block_tags)
+            if verbatim is not None:
+                if block:
+                    yield start, block, gap, None
+                    block, gap = [], 0
+                start = line_num
+        if verbatim is not None:
+            block.append(line)
+            if verbatim.feed(line):
+                yield start, block, gap, verbatim
+                block, gap, verbatim = [], 0, None
+        elif line:
+            if not block:
+                start = line_num
+            block.append(line)
+        elif block:
+            yield start, block, gap, None
+            block, gap = [], 1
+        else:
+            gap += 1
+    if verbatim is not None and not verbatim.is_html:
+        for sub_start, sub_block, sub_gap, _ in split_blocks(block):
+            yield start + sub_start, sub_block, sub_gap if sub_start else gap, None
+    elif block:
+        yield start, block, gap, verbatim
+
+
+def scan_document(lines, tab_length=4, limits=None, show_rows=None, exact=False, fences=True, block_tags=BLOCK_TAGS):
+    """ Stream markdown lines into Segments, using the same rules as ColumnsBlockProcessor
+        at the top level of a document.  Only the blocks of the table being considered are
+        held, so memory is bounded by the largest table rather than by the document.
+        show_rows is (first, last) data rows to keep of big tables, and exact sums columns exactly, as in Table.
+        Fenced code, if fences, and raw html blocks starting with one of block_tags are text, as they
+        are to markdown with the fenced_code extension. """
+    pending = deque()  # (start, lines, gap, verbatim) of blocks not yet given out
+    scanner, added, examined = None, 0, 0  # scanner holds the first `added` blocks of pending
+
+    def advance(final):
+        nonlocal scanner, added, examined
+        while pending:
+            if scanner is None:
+                if pending[0][3] or not any(RE_TWO_SPACES.search(line) or '\t' in line for line in pending[0][1]):
+                    yield _text_segment(pending)
+                    continue
+                scanner, added = TableScanner(tab_length, limits), 0
+            try:
+                decided = False
+                while added < len(pending) and not decided:
+                    start, block_lines, gap, verbatim = pending[added]
+                    examined = added + 1
+                    if (added and (gap != 1 or verbatim)) or not scanner.add(block_lines):
+                        decided = True
+                    else:
+                        added += 1
+                if not decided and not final:
+                    return  # the table may go on, wait for the next block
+                examined = scanner.blocks
+                yield from _finish_candidate(pending, scanner, show_rows, exact)
+            except ColumnsLimitExceeded:
+                # the whole candidate is text, as in ColumnsBlockProcessor.transform_table
+                for _ in range(max(examined, 1)):
+                    yield _text_segment(pending)
+            scanner = None
+
+    for block in split_blocks(normalize_lines(lines), fences, block_tags):
+        pending.append(block)
+        yield from advance(final=False)
+    yield from advance(final=True)
+
+
+def _text_segment(pending):
+    start, lines, gap, verbatim = pending.popleft()
+    return Segment(start, lines, verbatim=verbatim)
+
+
+def _finish_candidate(pending, scanner, show_rows=None, exact=False):
+    """ yield the table made of the first scanner.blocks of pending, or the first block as text """
+    if scanner.rejection():
+        yield _text_segment(pending)
+        return
+    try:
+        table = scanner.parse(show_rows, exact)
+    except ColumnsLimitExceeded:
+        raise
+    except ColumnsException:  # the first block is text, and the next may start a table
+        yield _text_segment(pending)
+        return
+    start = pending[0][0]
+    for _ in range(scanner.blocks):
+        pending.popleft()
+    yield Segment(start, scanner.lines, table, scanner.cols)
+
+
+def iter_tables(lines, tab_length=4, limits=None, exact=False, fences=True):
+    """ Yield a Table for each table in an iterable of markdown lines, without Python-Markdown.
+        Tables in raw html, or in fenced code if fences, are left alone; see scan_document. """
+    for segment in scan_document(lines, tab_length, limits, exact=exact, fences=fences):
+        if segment.table:
+            yield segment.table
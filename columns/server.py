@@ -0,0 +1,195 @@
+""" A local HTTP render service: POST markdown to /render and get HTML back.  Standard library only.
+
+    Markdown instances are kept warm in a pool and reused.  Responses carry a strong ETag from
+    the hash of the text and the configuration, so a conditional request is answered with 304
+    before anything is rendered, and rendered pages are shared between threads by ETag.
+    GET /stats returns latency histograms and cache hit rates as JSON.
+"""
+import hashlib
+import json
+from bisect import bisect_left
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from queue import Empty, Full, LifoQueue
+from threading import Lock
+from time import perf_counter
+
+from .cache import RenderCache
+
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+
+class LatencyHistogram:
+    """ counts of latencies in buckets of milliseconds """
+
+    def __init__(self, buckets=LATENCY_BUCKETS_MS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # the last is over the largest bucket
+        self.total_ms = 0.0
+        self.lock = Lock()
+
+    def add(self, seconds):
+        ms = seconds * 1000
+        with self.lock:
+            self.counts[bisect_left(self.buckets, ms)] += 1
+            self.total_ms += ms
+
+    def stats(self):
+        with self.lock:
+            count = sum(self.counts)
+            labels = [f'<={b}' for b in self.buckets] + [f'>{self.buckets[-1]}']
+            return {'count': count,
+                    'mean_ms': self.total_ms / count if count else 0.0,
+                    'buckets_ms': dict(zip(labels, self.counts))}
+
+
+class RenderService:
+    """ Renders markdown with the columns extension, for any number of threads.
+
+        extension_configs are ColumnsExtension options; extensions are other Python-Markdown
+        extensions by name.  pool_size Markdown instances are made up front and reused;
+        cache_size rendered pages are kept by ETag. """
+
+    def __init__(self, extension_configs=None, extensions=(), pool_size=8, cache_size=256):
+        self.extension_configs = dict(extension_configs or {})
+        self.extensions = list(extensions)
+        self.signature = json.dumps([self.extensions, sorted(self.extension_configs.items())], default=str).encode()
+        self.cache = RenderCache(cache_size)
+        self.render_latency = LatencyHistogram()
+        self.request_latency = LatencyHistogram()
+        self.counts = Counter()  # requests, renders, not_modified, errors
+        self.counts_lock = Lock()
+        self.rejections = None  # the columns RejectionCache the instances share
+        self.pool = LifoQueue(pool_size)
+        for _ in range(pool_size):
+            self.pool.put(self.new_markdown())
+
+    def new_markdown(self):
+        import markdown
+        from .extension import ColumnsExtension
+        md = markdown.Markdown(extensions=self.extensions + [ColumnsExtension(**self.extension_configs)])
+        self.rejections = md.parser.blockprocessors['columns'].rejections
+        return md
+
+    def count(self, name):
+        with self.counts_lock:
+            self.counts[name] += 1
+
+    def etag(self, text):
+        """ strong ETag of text rendered with this configuration """
+        digest = hashlib.sha256(self.signature + b'\0' + text.encode('utf-8')).hexdigest()
+        return f'"{digest[:32]}"'
+
+    def render(self, text, etag=None):
+        """ returns (etag, html) for text, from the cache or rendered by a pooled instance """
+        etag = etag or self.etag(text)
+        html = self.cache.get(etag)
+        if html is not None:
+            return etag, html
+        try:
+            md = self.pool.get_nowait()
+        except Empty:
+            md = self.new_markdown()  # every instance is busy
+        start = perf_counter()
+        try:
+            html = md.convert(text)
+        finally:
+            md.reset()
+            try:
+                self.pool.put_nowait(md)
+            except Full:
+                pass
+        self.render_latency.add(perf_counter() - start)
+        self.count('renders')
+        self.cache.put(etag, html)
+        return etag, html
+
+    def stats(self):
+        with self.counts_lock:
+            counts = dict(self.counts)
+        return {'counts': counts,
+                'latency': {'request': self.request_latency.stats(), 'render': self.render_latency.stats()},
+                'render_cache': self.cache.stats(),
+                'rejection_cache': self.rejections.stats() if self.rejections else None}
+
+
+def etag_matches(header, etag):
+    """ true if an If-None-Match header lists etag, or is * """
+    if not header:
+        return False
+    tags = [tag.strip() for tag in header.split(',')]
+    return '*' in tags or etag in tags or f'W/{etag}' in tags
+
+
+class RenderHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive: every response has a Content-Length
+    server_version = 'columns'
+    service = None  # RenderService, set by make_server
+    is_verbose = False
+
+    def do_POST(self):
+        start = perf_counter()
+        self.service.count('requests')
+        length = self.headers.get('Content-Length')
+        if length is None:  # the body can't be told from the next request, so end the connection
+            return self.send_body(411, 'text/plain', b'Content-Length required\n', close=True)
+        try:
+            length = int(length)
+            if length < 0:
+                raise ValueError(length)
+        except ValueError:
+            self.service.count('errors')
+            return self.send_body(400, 'text/plain', b'Bad Content-Length\n', close=True)
+        body = self.rfile.read(length)  # read even if it isn't wanted, so it isn't taken for the next request
+        if self.path.split('?')[0] != '/render':
+            return self.send_body(404, 'text/plain', b'Not found\n')
+        try:
+            text = body.decode('utf-8')
+        except UnicodeDecodeError:
+            self.service.count('errors')
+            return self.send_body(400, 'text/plain', b'Send markdown as UTF-8\n')
+        etag = self.service.etag(text)
+        if etag_matches(self.headers.get('If-None-Match'), etag):
+            self.service.count('not_modified')
+            self.send_body(304, None, b'', etag)
+        else:
+            try:
+                etag, html = self.service.render(text, etag)
+            except Exception as e:  # a broken extension, say; the client gets an answer, and the server goes on
+                self.service.count('errors')
+                self.log_error('render failed: %r', e)
+                return self.send_body(500, 'text/plain', b'Render failed\n')
+            self.send_body(200, 'text/html; charset=utf-8', html.encode('utf-8'), etag)
+        self.service.request_latency.add(perf_counter() - start)
+
+    def do_GET(self):
+        if self.path.split('?')[0] == '/stats':
+            body = json.dumps(self.service.stats(), indent=2).encode('utf-8')
+            self.send_body(200, 'application/json', body)
+        else:
+            self.send_body(404, 'text/plain', b'Not found\n')
+
+    def send_body(self, status, content_type, body, etag=None, close=False):
+        self.send_response(status)
+        if close:
+            self.send_header('Connection', 'close')
+            self.close_connection = True
+        if etag:
+            self.send_header('ETag', etag)
+            self.send_header('Cache-Control', 'no-cache')  # always revalidate, which is cheap
+        if status != 304:
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if self.is_verbose:
+            super().log_message(format, *args)
+
+
+def make_server(host='127.0.0.1', port=8000, service=None, verbose=False):
+    """ a ThreadingHTTPServer for service, not yet serving; port 0 picks a free port """
+    handler = type('Handler', (RenderHandler,), {'service': service or RenderService(), 'is_verbose': verbose})
+    return ThreadingHTTPServer((host, port), handler)
@@ -0,0 +1,126 @@
+""" A log of tables slow to detect, parse and render, with their source kept to replay.
+
+    Each slow table is reported on stderr with its shape and the time of each phase.  With a
+    directory, its lines are written there as slow-HASH.md, a markdown document of just that
+    table, with slow-HASH.json beside it holding the shape and times.  The same table is written
+    once, however often it is slow.  The oldest files go when the directory is over its size.
+    replay renders every reproducer again and times it.
+"""
+import hashlib
+import json
+import os
+from collections import deque
+from pathlib import Path
+from sys import stderr
+from time import perf_counter, time
+
+from .patterns import RE_PLACEHOLDER
+
+PREFIX = 'slow-'
+
+
+def table_shape(lines, cols, table=None):
+    """ rows, columns, widest line, deepest list and placeholders of a table's lines and column stops,
+        and of its RenderedTable if it got that far """
+    return {'rows': len(table.rows) if table else len(lines),
+            'columns': len(cols),
+            'max_line_width': max(map(len, lines), default=0),
+            'list_depth': max((c.list_.depth for row in table.rows for c in row.cells if c.list_), default=0)
+            if table else None,
+            'placeholders': sorted({m.group(0) for line in lines if '<' in line
+                                    for m in RE_PLACEHOLDER.finditer(line)})}
+
+
+class SlowTableLog:
+    """ Records tables whose detection, parse and render take more than threshold seconds in all.
+        The last keep entries are in entries; reproducers go to directory, kept under max_bytes. """
+
+    def __init__(self, threshold, directory='', max_bytes=10_000_000, keep=100):
+        self.threshold = threshold
+        self.directory = Path(directory) if directory else None
+        self.max_bytes = max_bytes
+        self.entries = deque(maxlen=keep)
+
+    def record(self, lines, cols, table, times, limit=None):
+        """ Log a table if it was slow.  times are seconds by phase; table is the RenderedTable, or None
+            if the table went over limit, such as the time budget.  Returns the entry, or None. """
+        total = sum(times.values())
+        if total <= self.threshold:
+            return None
+        entry = {'time': time(), 'ms': {phase: round(seconds * 1000, 3) for phase, seconds in times.items()},
+                 'shape': table_shape(lines, cols, table), 'limit': limit, 'reproducer': None}
+        if self.directory is not None:
+            self.write_reproducer(lines, entry)
+        self.entries.append(entry)
+        shape = entry['shape']
+        phases = ', '.join(f'{phase} {ms:.1f}' for phase, ms in entry['ms'].items())
+        print(f"Columns: slow table, {total * 1000:.1f} ms ({phases}): {shape['rows']} rows, "
+              f"{shape['columns']} columns, lines up to {shape['max_line_width']}, list depth {shape['list_depth']}, "
+              f"placeholders {' '.join(shape['placeholders']) or 'none'}"
+              + (f", over {limit}" if limit else '')
+              + (f", in {entry['reproducer']}" if entry['reproducer'] else ''), file=stderr)
+        return entry
+
+    def write_reproducer(self, lines, entry):
+        """ write the table's lines and entry to the directory, setting the entry's reproducer """
+        text = '\n'.join(lines) + '\n'
+        data = text.encode('utf-8')
+        if len(data) > self.max_bytes:
+            return  # would push every other reproducer out
+        name = PREFIX + hashlib.sha1(data).hexdigest()[:16]
+        path = self.directory / f'{name}.md'
+        entry['reproducer'] = str(path)
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            if path.exists():
+                os.utime(path)  # seen again: newest, so kept longest
+            else:
+                path.write_bytes(data)
+            (self.directory / f'{name}.json').write_text(json.dumps(entry, indent=1), encoding='utf-8')
+            self.rotate()
+        except OSError as e:
+            entry['reproducer'] = None
+            print(f'Columns: slow table not saved, {e}', file=stderr)
+
+    def rotate(self):
+        """ remove the oldest reproducers until the directory is within max_bytes, keeping the newest """
+        files = []
+        for path in self.directory.glob(PREFIX + '*.md'):
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                continue  # rotated by another process
+            files.append((st.st_mtime_ns, path, st.st_size + self.json_size(path)))
+        total = sum(size for _, _, size in files)
+        for _, path, size in sorted(files)[:-1]:
+            if total <= self.max_bytes:
+                break
+            for stale in (path, path.with_suffix('.json')):
+                try:
+                    stale.unlink()
+                except FileNotFoundError:
+                    pass
+            total -= size
+
+    @staticmethod
+    def json_size(path):
+        try:
+            return path.with_suffix('.json').stat().st_size
+        except FileNotFoundError:
+            return 0
+
+
+def replay(directory, md=None):
+    """ render each reproducer in directory; returns [(path, seconds)], slowest first """
+    if md is None:
+        import markdown
+        from .extension import ColumnsExtension
+        md = markdown.Markdown(extensions=[ColumnsExtension()])
+    results = []
+    for path in sorted(Path(directory).glob(PREFIX + '*.md')):
+        text = path.read_text(encoding='utf-8')
+        start = perf_counter()
+        md.convert(text)
+        results.append((path, perf_counter() - start))
+        md.reset()
+    return sorted(results, key=lambda result: -result[1])
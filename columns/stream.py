@@ -0,0 +1,130 @@
+""" Streaming HTML output: a document rendered a chunk at a time, for chunked responses. """
+# noinspection PyPep8Naming
+import xml.etree.ElementTree as etree
+
+from .emit import RenderedTable
+from .patterns import RE_CELL, RE_FENCE
+from .scan import scan_document
+from .util import ColumnsException
+
+TEXT_CHUNK_LINES = 200  # text lines held before looking for a place to send them
+
+
+def iter_html(lines, md=None, batch_rows=500):
+    """ Yield the HTML of an iterable of markdown lines in chunks, as each run of text or
+        batch of table rows is done.  ''.join() of the chunks is md.convert() of the document.
+
+        md is a markdown.Markdown using ColumnsExtension, which supplies the other extensions
+        and the table options; by default one with just ColumnsExtension.  Text between tables
+        is converted in runs, split only between unindented paragraphs once they get long.
+        Raw html, and fenced code if md has fenced_code, are text, as they are to md.
+        References and extensions that gather the whole document, like footnotes and toc,
+        only see the run they are in.  Blocks that start no table in the document start none in
+        their run, and no table in a run goes on past it, though the run alone might make one.
+    """
+    if md is None:
+        import markdown
+        from .extension import ColumnsExtension
+        md = markdown.Markdown(extensions=[ColumnsExtension()])
+    if 'columns' not in md.parser.blockprocessors:
+        raise ColumnsException('iter_html needs a Markdown with ColumnsExtension')
+    processor = md.parser.blockprocessors['columns']
+    md.reset()
+
+    text, fences, end, first, block, verbatim, decided = [], 0, 0, True, None, None, set()
+    segments = scan_document(lines, md.tab_length, processor.limits, processor.show_rows, processor.exact,
+                             fences='fenced_code_block' in md.preprocessors,
+                             block_tags=md.block_level_elements if 'html_block' in md.preprocessors else ())
+    for segment in segments:
+        gap = [''] * (segment.start - end)
+        end, prev, block = segment.end, block, segment.lines
+        if not segment.table and not (len(text) >= TEXT_CHUNK_LINES and not fences % 2 and _is_break(prev, block)):
+            text += gap + block
+            fences += sum(1 for line in block if RE_FENCE.match(line))
+            verbatim = segment.verbatim
+            decided.add(_block_key(md, block))
+            continue
+        next_block = None if len(gap) != 1 or segment.verbatim else block[:block.index('')] if '' in block else block
+        html = _convert(md, processor, text, decided, next_block) if text else ''
+        if html and gap and verbatim is not None and verbatim.fence is None:
+            html += '\n'  # markdown keeps the blank line after raw html, unless it ends the document
+        if html:  # text such as a link reference alone converts to nothing, and gets no newline
+            yield ('' if first else '\n') + html
+            first = False
+        verbatim = segment.verbatim
+        if segment.table:
+            text, fences = [], 0
+            chunks = _table_chunks(md, processor, RenderedTable.from_table(segment.table), batch_rows)
+            yield ('' if first else '\n') + next(chunks)
+            yield from chunks
+            first = False
+        else:
+            text, fences = list(block), sum(1 for line in block if RE_FENCE.match(line))
+            decided = {_block_key(md, block)}
+    html = _convert(md, processor, text, decided, None) if text else ''
+    if html:
+        yield ('' if first else '\n') + html
+
+
+def _is_break(prev, block):
+    """ True if the text up to prev converts the same without block and what follows.
+        Not next to raw html, or before list items and indented lines, which may continue prev. """
+    indent, bullet, ordinal, body = RE_CELL.match(block[0]).groups()
+    return not (indent or bullet or ordinal or prev[0].startswith('<') or block[0].startswith('<'))
+
+
+def _block_key(md, lines):
+    """ a block of lines as the columns processor is given it """
+    return '\n'.join(line.expandtabs(md.tab_length) for line in lines)
+
+
+def _convert(md, processor, text, decided, next_block):
+    """ html of a run of text as it converts in the whole document.  The blocks in decided start
+        no table there, and a table that would go on into next_block, the lines after the run, is none. """
+    processor.text_blocks, processor.next_block = decided, next_block
+    try:
+        html = md.convert('\n'.join(text))
+    finally:
+        processor.text_blocks, processor.next_block = set(), None
+    md.htmlStash.reset()
+    return html
+
+
+def _table_chunks(md, processor, table, batch_rows):
+    """ yield the HTML of table in batches of rows, each run through md like the rest of the document """
+    root = etree.Element(md.doc_tag)
+    processor.start_table(root)
+    t_table = etree.SubElement(root, 'table', {'class': 'columns'})
+    deferred, is_open = [], False
+    for row in processor.visible_rows(table, deferred):
+        processor.render_row(t_table, table, row)
+        if len(t_table) >= batch_rows:
+            yield _serialize(md, root, is_open, False)
+            root, is_open = etree.Element(md.doc_tag), True
+            t_table = etree.SubElement(root, 'table', {'class': 'columns'})
+    yield _serialize(md, root, is_open, True)
+    if deferred:
+        root = etree.Element(md.doc_tag)
+        processor.emit_virtual_rows(root, table, deferred)
+        yield '\n' + _serialize(md, root, False, True)
+
+
+def _serialize(md, root, is_open, is_closed):
+    """ HTML of the children of root, as Markdown.convert would write them.  The last child is
+        a table whose open tag was already sent if is_open, and whose end tag is left off unless is_closed """
+    for treeprocessor in md.treeprocessors:
+        new_root = treeprocessor.run(root)
+        if new_root is not None:
+            root = new_root
+    output = md.serializer(root)
+    output = output[output.index('<%s>' % md.doc_tag) + len(md.doc_tag) + 2:output.rindex('</%s>' % md.doc_tag)]
+    if root[-1].tag == 'table':
+        if is_open:
+            output = output[output.rindex('<table'):]
+            output = output[output.index('>') + 1:]
+        if not is_closed:
+            output = output[:output.rindex('</table>')]
+    for pp in md.postprocessors:
+        output = pp.run(output)
+    md.htmlStash.reset()
+    return output.strip('\n') + ('' if is_closed else '\n')
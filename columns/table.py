@@ -0,0 +1,737 @@
+""" The table model: lexed cells and rows, typed columns, and computed footers. """
+import heapq
+from array import array
+from decimal import Decimal
+from enum import IntEnum
+from itertools import repeat
+from operator import sub
+from threading import Lock
+from time import perf_counter
+from typing import List, Tuple
+
+from .footer import compile_footer
+from .patterns import (DECORATION_CHARS, FILL, NUMBER_CRUFT, NUMBER_CRUFT_CHARS, RE_CELL, RE_DATE, RE_DIRECTIVE,
+                       RE_IGNORABLE, RE_NUMBER, RE_NUMBER_LINES, RE_PLACEHOLDER, SEPARATOR_CHARS)
+from .util import ColumnsException, ColumnsLimitExceeded, debug_table, num_str
+
+
+class ListInfo:
+    def __init__(self, indent, is_ordered):
+        self.indent = indent
+        self.is_ordered = is_ordered
+        # usually set later as entire table is needed.
+        self.order_sequence = 0
+        self.depth = 0
+
+
+class Shape(IntEnum):
+    """ numeric shape of a cell's text, as found by the lexer """
+    text = 0
+    ignorable = 1  # blank, dashes, or n/a: fits in a numeric column but isn't counted
+    integer = 2
+    decimal = 3
+    percent = 4
+    currency = 5
+
+
+# Precompiled lexer patterns.  Each cell is matched once by RE_CELL; the remaining
+# classification is done with string methods on the matched body.
+
+
+def lex_number(text):
+    """ return (shape, value) for text, correcting for percent signs and cruft.
+        value is a float, or None if text isn't a number.  Never raises. """
+    cleaned = text.translate(NUMBER_CRUFT)
+    if not RE_NUMBER.fullmatch(cleaned):
+        return (Shape.ignorable if RE_IGNORABLE.fullmatch(text) else Shape.text), None
+    value = float(cleaned)
+    shape = number_shape(text, cleaned)
+    return shape, (value / 100.0 if shape == Shape.percent else value)
+
+
+def number_shape(text, cleaned):
+    """ shape of text known to be a number, given its text without cruft """
+    if '%' in text:
+        return Shape.percent
+    elif '$' in text:
+        return Shape.currency
+    elif cleaned.strip().lstrip('+-').isdigit():
+        return Shape.integer
+    else:
+        return Shape.decimal
+
+
+def parse_numbers(texts):
+    """ Parse a whole column of cell texts with the same rules as lex_number.
+        Returns (values, valid, percent): an array('d') of values, 0.0 where not a number,
+        and bytearray masks of which texts are numbers and which have percent signs.
+        The texts are joined and scanned by one compiled pattern; nothing raises. """
+    texts = [text.replace('\n', ' ') if '\n' in text else text for text in texts]
+    values = array('d', bytes(8 * len(texts)))
+    valid = bytearray(len(texts))
+    percent = bytearray('%' in text for text in texts)
+    if not texts:
+        return values, valid, percent
+    joined = '\n'.join(texts).translate(NUMBER_CRUFT)
+    for i, m in enumerate(RE_NUMBER_LINES.finditer(joined)):
+        if m.group(1) is not None:
+            valid[i] = 1
+            values[i] = float(m.group(1)) / 100.0 if percent[i] else float(m.group(1))
+    return values, valid, percent
+
+
+class Cell:
+    """ One lexed cell.  The text is scanned once, here; everything later reads the results. """
+
+    def __init__(self, text):
+        indent, bullet, ordinal, body = RE_CELL.match(text).groups()
+        if bullet or ordinal:
+            self.list_ = ListInfo(indent=len(indent), is_ordered=bool(ordinal))
+        else:
+            self.list_ = None
+        self.set_text(body.strip())
+
+    @classmethod
+    def plain(cls, text):
+        """ a cell of text as it is, such as from a CSV file: no list marker, and no placeholders """
+        cell = cls.__new__(cls)
+        cell.list_ = None
+        cell.set_text(text.strip())
+        cell.placeholders = ()
+        return cell
+
+    def set_text(self, text):
+        """ replace the text (not the list marker) and re-lex it """
+        self.text = text
+        self.shape, self.value = lex_number(text)
+        self.placeholders = tuple(RE_PLACEHOLDER.findall(text)) if '<' in text else ()
+        self.is_separator = not text.strip(SEPARATOR_CHARS)
+        self.is_decorated = not text or (len(text) >= 2 and text[0] in DECORATION_CHARS and text[-1] == text[0])
+
+    def is_numeric_column_like(self):
+        """ true if string is a number, or something belonging in a numeric column """
+        return self.value is not None or self.shape == Shape.ignorable
+
+    def _try_number(self):
+        """ return float, correcting for percent signs and cruft, or None if not parsable """
+        return self.value
+
+    def is_number(self):
+        """ true is string is a number, including '$' """
+        return self.value is not None
+
+    def as_number(self):
+        """ return string as number (including '$'), or 0 if not parsable """
+        return self.value if self.value is not None else 0
+
+    def is_countable(self):
+        """ true iff string is countable by <#>.
+            That is, non-ignorable value, skipping blanks, dashes, and n/a values """
+        return self.shape != Shape.ignorable
+
+
+class Kinds(IntEnum):
+    tbd = 0
+    header = 1
+    data = 2
+    blank_sep = 3
+    footer = 4
+    elided = 5  # stands in for data rows that are aggregated but not shown
+
+
+# Display lines are indexed by display column: FILL follows each double width character, and a
+# character with combining marks is one private use character, so no column stop falls inside it.
+DISPLAY_TEXT = {ord(FILL): None}  # display line character -> the text it stands for, for str.translate
+CLUSTERS = {}  # character with combining marks -> the private use character standing for it
+FIRST_CLUSTER, LAST_CLUSTER = 0x100000, 0x10FFFD  # Supplementary Private Use Area-B
+clusters_lock = Lock()
+
+
+def cluster_char(text):
+    """ the private use character standing for text, a character with combining marks, in display lines;
+        text itself if they have all been used """
+    char = CLUSTERS.get(text)
+    if char is None:
+        with clusters_lock:
+            char = CLUSTERS.get(text)
+            if char is None:
+                code = FIRST_CLUSTER + len(CLUSTERS)
+                if code > LAST_CLUSTER:
+                    return text
+                char = CLUSTERS[text] = chr(code)
+                DISPLAY_TEXT[code] = text
+    return char
+
+
+def display_text(text):
+    """ the text of part of a display line, as it was written """
+    return text if text.isascii() and FILL not in text else text.translate(DISPLAY_TEXT)
+
+
+class TableRow:
+    def __init__(self, text, columns: List[Tuple[int, int]]):
+        """ lex the line left to right, one cell per column, folding cell results into row status.
+            text may be a display line; the row's and cells' texts are as written. """
+        is_display = not text.isascii()
+        self.text = (text.translate(DISPLAY_TEXT) if is_display else text).rstrip()
+        self.kind = Kinds.tbd
+        self.set_cells([Cell((text[start:end].translate(DISPLAY_TEXT) if is_display else text[start:end]).rstrip())
+                        for (start, end) in columns])
+
+    @classmethod
+    def from_cells(cls, kind, cells):
+        """ a row of cells made already, its text their texts two spaces apart """
+        row = cls.__new__(cls)
+        row.text = '  '.join(cell.text for cell in cells).rstrip()
+        row.kind = kind
+        row.set_cells(cells)
+        return row
+
+    def set_cells(self, cells):
+        """ fold the cells' results into row status """
+        self.cells = cells
+        self.is_blank = not self.text
+        all_separator, all_decorated, calculated = True, True, False
+        for cell in cells:
+            all_separator = all_separator and cell.is_separator
+            all_decorated = all_decorated and cell.is_decorated
+            calculated = calculated or bool(cell.placeholders)
+        self.is_separator = not self.is_blank and all_separator
+        self.is_decorated = not self.is_blank and all_decorated
+        self.is_calculated = calculated
+
+    def __str__(self):
+        return f"({str(self.kind)}, col_text={'|'.join((c.text for c in self.cells))}"
+
+    def is_all_decorated(self):
+        return self.is_decorated
+
+    def is_all_separator(self):
+        return self.is_separator
+
+    def has_calculated(self):
+        return self.is_calculated
+
+
+class Align(IntEnum):
+    left = 0
+    right = 1
+
+
+class ColumnType(IntEnum):
+    empty = 0  # only blanks, dashes and n/a
+    integer = 1
+    decimal = 2
+    percentage = 3
+    currency = 4
+    mixed = 5  # numbers that don't combine into one type, like currency and percentages
+    date = 6
+    text = 7
+
+
+NUMERIC_TYPES = {ColumnType.integer, ColumnType.decimal, ColumnType.percentage, ColumnType.currency,
+                 ColumnType.mixed}
+SHAPE_TYPES = {Shape.integer: ColumnType.integer, Shape.decimal: ColumnType.decimal,
+               Shape.percent: ColumnType.percentage, Shape.currency: ColumnType.currency}
+
+
+class Column:
+    """ Type, parsed values and aggregates of one column of data cells, found in one pass.
+
+        With exact, total is a Decimal summed from the numbers as written, keeping their decimal
+        places, rather than a float.  Fixed point numbers are summed as integers scaled by the most
+        decimal places seen so far; only numbers with exponents, inf and nan are summed as Decimals. """
+
+    def __init__(self, cells, exact=False):
+        self.values = []  # float, or None if not a number, for each shown data cell
+        self.count = 0  # cells countable by <#>
+        self.numbers = 0  # cells with a number
+        self.total = 0
+        self.exact = exact
+        self.scaled_total = 0  # with exact: the sum of fixed point numbers, times 10 ** scale
+        self.scale = 0
+        self.decimal_total = None  # with exact: the sum of the other numbers, a Decimal
+        self.hidden = 0  # data cells aggregated by add_hidden, not in values
+        self.hidden_filled = 0  # ... of which have text
+        self.types = set()
+        numbers = []  # cells with a number, for exact
+        for cell in cells:
+            self.values.append(cell.value)
+            if cell.shape == Shape.ignorable:
+                continue
+            self.count += 1
+            if cell.value is not None:
+                self.numbers += 1
+                if exact:
+                    numbers.append(cell)
+                else:
+                    self.total += cell.value
+                self.types.add(SHAPE_TYPES[cell.shape])
+            elif RE_DATE.fullmatch(cell.text):
+                self.types.add(ColumnType.date)
+            else:
+                self.types.add(ColumnType.text)
+        if exact:
+            self.add_exact([cell.text for cell in numbers], [cell.shape == Shape.percent for cell in numbers])
+            self.total = self.exact_total()
+        self.type_ = self.combine_types(set(self.types))
+
+    def add_exact(self, texts, percents):
+        """ add the numbers in texts, and flags of which are percentages, to the exact total.
+            Numbers with the same decimal places are summed as integers together, in C for the
+            usual column, where they all have the same places. """
+        if not texts:
+            return
+        joined = '\n'.join(texts)
+        for ch in NUMBER_CRUFT_CHARS:
+            joined = joined.replace(ch, '')  # quicker than translate, on a whole column
+        numbers = joined.split('\n')
+        if '.' not in joined:
+            places = {0}
+        else:
+            dots = list(map(str.find, numbers, repeat('.')))
+            places = set(map(sub, map(len, numbers), dots)) if min(dots) >= 0 else None  # places + 1
+            places = {places.pop() - 1} if places and len(places) == 1 else None
+        if places and (not any(percents) or all(percents)):
+            groups = {(places.pop(), bool(percents[0])): (joined, numbers)}
+        else:  # mixed precision
+            groups = {}
+            for number, is_percent in zip(numbers, percents):
+                groups.setdefault((len(number.partition('.')[2]), bool(is_percent)), []).append(number)
+            groups = {key: ('\n'.join(group), group) for key, group in groups.items()}
+        for (places, is_percent), (joined, numbers) in sorted(groups.items()):
+            try:
+                subtotal = sum(map(int, joined.replace('.', '').split('\n')))
+            except ValueError:  # an exponent, inf or nan among them
+                subtotal, is_fixed = 0, False
+                for number in numbers:
+                    try:
+                        subtotal += int(number.replace('.', ''))
+                        is_fixed = True
+                    except ValueError:
+                        value = Decimal(number).scaleb(-2) if is_percent else Decimal(number)
+                        self.decimal_total = value if self.decimal_total is None else self.decimal_total + value
+                if not is_fixed:
+                    continue  # the places counted the exponent's digits
+            places += 2 if is_percent else 0
+            if places > self.scale:
+                self.scaled_total *= 10 ** (places - self.scale)
+                self.scale = places
+            self.scaled_total += subtotal * 10 ** (self.scale - places)
+
+    def exact_total(self):
+        total = Decimal(f'{self.scaled_total}E-{self.scale}')  # exact, whatever the precision of the context
+        if self.decimal_total is None:
+            return total
+        total += self.decimal_total
+        return total if total.is_finite() else float(total)  # inf and nan, shown as floats are
+
+    def add_hidden(self, texts):
+        """ aggregate data cells that won't be shown, straight from their (list marker free) texts """
+        values, valid, percent = parse_numbers(texts)
+        for text, value, is_valid in zip(texts, values, valid):
+            self.hidden += 1
+            if text:
+                self.hidden_filled += 1
+            if is_valid:
+                self.count += 1
+                self.numbers += 1
+                if not self.exact:
+                    self.total += value
+                self.types.add(SHAPE_TYPES[number_shape(text, text.translate(NUMBER_CRUFT))])
+            elif not RE_IGNORABLE.fullmatch(text):
+                self.count += 1
+                self.types.add(ColumnType.date if RE_DATE.fullmatch(text) else ColumnType.text)
+        if self.exact:
+            numbers = [i for i, is_valid in enumerate(valid) if is_valid]
+            self.add_exact([texts[i] for i in numbers], [percent[i] for i in numbers])
+            self.total = self.exact_total()
+        self.type_ = self.combine_types(set(self.types))
+
+    @staticmethod
+    def combine_types(types):
+        if not types:
+            return ColumnType.empty
+        elif len(types) == 1:
+            return types.pop()
+        elif not types <= NUMERIC_TYPES:
+            return ColumnType.text
+        elif types == {ColumnType.integer, ColumnType.decimal}:
+            return ColumnType.decimal
+        elif types <= {ColumnType.integer, ColumnType.decimal, ColumnType.currency}:
+            return ColumnType.currency
+        else:
+            return ColumnType.mixed
+
+    def is_numeric(self):
+        """ true if the column belongs right aligned: numbers, or nothing but ignorable values """
+        return self.type_ in NUMERIC_TYPES or self.type_ == ColumnType.empty
+
+
+ELIDED = object()  # marks where hidden rows were taken out of the lines of a table
+HIDDEN_CHUNK = 4096  # hidden lines aggregated at a time
+DEADLINE_ROWS = 1024  # rows lexed between looks at the clock
+
+
+def check_deadline(deadline):
+    """ raise ColumnsLimitExceeded if perf_counter() has passed deadline, as update_spaces_in_lines does """
+    if deadline is not None and perf_counter() > deadline:
+        raise ColumnsLimitExceeded('time_budget', perf_counter() - deadline, 0)
+
+
+class Table:
+    """ A table is a collection of TableLines.  Userlist requires __init__ signature. """
+
+    # Userlist feels like too much 'behind the scenes stuff'.
+    def __init__(self, lines, col_stops, show_rows=None, exact=False, deadline=None):
+        """ show_rows, if given, is (first, last): how many data rows to show at each end.
+            Data rows between those are aggregated into the footer without making rows or cells,
+            and one Kinds.elided row stands in for them.
+            exact sums columns as Decimals, keeping their decimal places; see Column.
+            deadline is a perf_counter() value to give up at, raising ColumnsLimitExceeded, or None. """
+        self.exact = exact
+        hidden = []
+        if show_rows and lines and RE_DIRECTIVE.search(lines[0]):
+            show_rows = None  # sort and top need every row
+        if show_rows:
+            lines, hidden = self.split_hidden(lines, col_stops, *show_rows)
+        self.hidden_rows = sum(1 for line in hidden if line.strip())
+        self.rows = []
+        for r_i, line in enumerate(lines):
+            if r_i % DEADLINE_ROWS == 0:
+                check_deadline(deadline)
+            if line is ELIDED:
+                row = self.elided_row(len(col_stops))
+            else:
+                row = TableRow(line, col_stops)
+            self.rows.append(row)
+        self.set_row_kinds()
+        self.columns = self.infer_column_types()
+        check_deadline(deadline)
+        self.add_hidden_rows(hidden, col_stops, deadline)
+        self.calculate()
+        debug_table(f"cols: {col_stops}")
+        debug_table("\n".join(str(l) for l in self.rows))
+
+    @classmethod
+    def from_rows(cls, rows, show_rows=None, exact=False):
+        """ The Table of rows of cell texts, such as from a CSV file, with no lines to lay out and lex.
+            The first row is the header, a last row with placeholders is the footer, and a row of empty
+            cells is a blank separator.  Other cells are taken as they are: no list markers or placeholders.
+            show_rows and exact are as for Table(). """
+        table = cls.__new__(cls)
+        table.exact = exact
+        num_cols = max(map(len, rows))
+        rows = [row + [''] * (num_cols - len(row)) if len(row) < num_cols else row for row in rows]
+        foot = 1 if len(rows) > 2 and any(RE_PLACEHOLDER.search(text) for text in rows[-1]) else 0
+        header, body, footer = rows[0], rows[1:len(rows) - foot], rows[len(rows) - foot:]
+        hidden = []
+        if show_rows and not any(RE_DIRECTIVE.search(text) for text in header):
+            kept = cls.hidden_span(body, *show_rows, is_data=any)
+            if kept:
+                hidden = body[kept[0]:kept[1]]
+                body = body[:kept[0]] + [ELIDED] + body[kept[1]:]
+        table.hidden_rows = sum(1 for row in hidden if any(row))
+        table.rows = [TableRow.from_cells(Kinds.header, [Cell.plain(text) for text in header])]
+        for row in body:
+            if row is ELIDED:
+                table.rows.append(table.elided_row(num_cols))
+            else:
+                table.rows.append(TableRow.from_cells(Kinds.data if any(row) else Kinds.blank_sep,
+                                                      [Cell.plain(text) for text in row]))
+        table.rows += [TableRow.from_cells(Kinds.footer, [Cell(text) for text in row]) for row in footer]
+        table.columns = table.infer_column_types()
+        for c_i, column in enumerate(table.columns):
+            column.add_hidden([row[c_i].strip() for row in hidden if any(row)])
+        table.calculate()
+        return table
+
+    def elided_row(self, num_cols):
+        """ the row standing in for the hidden rows """
+        row = TableRow.from_cells(Kinds.elided, [Cell.plain('') for _ in range(num_cols)])
+        row.text = f'… {num_str(self.hidden_rows)} more rows'
+        return row
+
+    def calculate(self):
+        """ alignments, lists, the footer and directives, once the rows have kinds and the columns their aggregates """
+        self.col_alignment = self.find_column_alignments()
+        self.organize_column_lists()
+        self.replace_calc_fields()
+        self.apply_directives()
+
+    def __str__(self):
+        return f'(table:{len(self.rows)}) {[str(row) for row in self.rows]}'
+
+    @property
+    def col_types(self):
+        return [column.type_ for column in self.columns]
+
+    def data_rows(self):
+        return [row for row in self.rows if row.kind == Kinds.data]
+
+    def write_csv(self, out, dialect='excel'):
+        """ write the table as CSV, a row at a time; see export.write_csv """
+        from .export import write_csv
+        write_csv(self, out, dialect)
+
+    def write_json(self, out):
+        """ write the table as JSON, a row at a time; see export.write_json """
+        from .export import write_json
+        write_json(self, out)
+
+    def to_buffers(self):
+        """ the table as numeric buffers and validity masks by column; see export.TableBuffers """
+        from .export import TableBuffers
+        return TableBuffers(self)
+
+    def pack(self):
+        """ the table as compact bytes, to be read in place by packed.PackedTable """
+        from .packed import pack_table
+        return pack_table(self)
+
+    def infer_column_types(self):
+        """ type each column, keeping parsed values and aggregates, in one pass over the data rows """
+        data_rows = self.data_rows()
+        return [Column([row.cells[c_i] for row in data_rows], self.exact) for c_i in range(len(self.rows[0].cells))]
+
+    @staticmethod
+    def split_hidden(lines, col_stops, first, last):
+        """ returns (lines to show, with ELIDED in place of the hidden lines, hidden lines).
+            The header and footer are found with the same rules as set_row_kinds. """
+        end = len(lines)
+        while end and not lines[end - 1].strip():
+            end -= 1  # trailing blank lines
+        head = 2 if end > 1 and TableRow(lines[1], col_stops).is_separator else 0
+        if end - head >= 2 and TableRow(lines[end - 2], col_stops).is_separator:
+            foot = 2
+        elif end - head >= 1 and TableRow(lines[end - 1], col_stops).is_calculated:
+            foot = 1
+        else:
+            foot = 0
+        body = lines[head:end - foot]
+        kept = Table.hidden_span(body, first, last, str.strip)
+        if not kept:
+            return lines, []
+        keep_first, keep_last = kept
+        return lines[:head] + body[:keep_first] + [ELIDED] + body[keep_last:] + lines[end - foot:end], \
+            body[keep_first:keep_last]
+
+    @staticmethod
+    def hidden_span(body, first, last, is_data):
+        """ (start, end) of the rows of body between the first and last data rows to show,
+            or None if no data rows would be hidden.  is_data(row) is true for a data row. """
+        def after_data_rows(indexes, count):
+            for i in indexes:
+                if count <= 0:
+                    return i
+                count -= 1 if is_data(body[i]) else 0
+            return None
+
+        keep_first = after_data_rows(range(len(body)), first)
+        keep_last = after_data_rows(range(len(body) - 1, -1, -1), last)
+        if keep_first is None or keep_last is None or keep_first > keep_last:
+            return None
+        keep_last += 1
+        if not any(is_data(row) for row in body[keep_first:keep_last]):
+            return None
+        return keep_first, keep_last
+
+    def add_hidden_rows(self, hidden, col_stops, deadline=None):
+        """ aggregate the hidden data rows into self.columns, a chunk of lines at a time """
+        for chunk_start in range(0, len(hidden), HIDDEN_CHUNK):
+            check_deadline(deadline)
+            chunk = [line for line in hidden[chunk_start:chunk_start + HIDDEN_CHUNK] if line.strip()]
+            if any(RE_PLACEHOLDER.search(line) for line in chunk):
+                raise ColumnsException('Calculated field outside footer')
+            for column, (start, end) in zip(self.columns, col_stops):
+                column.add_hidden([RE_CELL.match(display_text(line[start:end]).rstrip()).group(4).strip()
+                                   for line in chunk])
+
+    def organize_column_lists(self):
+        """ set depth and sequence numbers for all list items """
+        num_cells = len(self.rows[0].cells)
+        for cell_num in range(num_cells):
+            for row_num, row in enumerate(self.rows):
+                cell = row.cells[cell_num]
+                if cell.list_:
+                    for above in range(row_num - 1, -1, -1):
+                        above_cell = self.rows[above].cells[cell_num]
+                        if not above_cell.list_:
+                            # found a top level
+                            cell.list_.depth = 1
+                            cell.list_.order_sequence = 1
+                            break
+                        elif above_cell.list_.indent < cell.list_.indent:
+                            # found a list item parent
+                            cell.list_.depth = above_cell.list_.depth + 1
+                            cell.list_.order_sequence = 1
+                            break
+                        elif above_cell.list_.indent == cell.list_.indent:
+                            # found a peer item, at same depth
+                            cell.list_.depth = above_cell.list_.depth
+                            cell.list_.order_sequence = above_cell.list_.order_sequence + 1
+                            cell.list_.is_ordered = above_cell.list_.is_ordered
+                            break
+                        else:
+                            # found some child of a node further up the table, ignore
+                            pass
+
+        for row_num, row in enumerate(self.rows):
+            pass
+
+    def set_row_kinds(self):
+        def check_rows():
+            if len(self.rows) < 2:
+                raise ColumnsException('Too few rows')
+
+        if self.rows[1].is_separator:
+            self.rows[0].kind = Kinds.header
+            del self.rows[1]
+            check_rows()
+
+        while not self.rows[-1].text:
+            del self.rows[-1]  # kill trailing blank lines
+            check_rows()
+        if self.rows[-2].is_separator:
+            self.rows[-1].kind = Kinds.footer
+            del self.rows[-2]
+            check_rows()
+        elif self.rows[-1].is_calculated:
+            self.rows[-1].kind = Kinds.footer
+
+        for row_num, row in enumerate(self.rows):
+            if row.kind == Kinds.tbd:
+                if row.is_calculated:
+                    raise ColumnsException('Calculated field outside footer')
+                elif row.text:
+                    row.kind = Kinds.data
+                else:
+                    row.kind = Kinds.blank_sep  # might be bottom of table, but will delete it soon
+
+    def calc_row(self, row: TableRow):
+        """ Fills in calculated fields in a row from the aggregates of the data rows.
+            For example, '<#>' in any field would be replaced with the number of countable items.
+            Each cell's text is compiled once into a FooterTemplate, shared by every table using it.
+        """
+        for cell_num, cell in enumerate(row.cells):
+            if cell.placeholders:
+                cell.set_text(compile_footer(cell.text).render(self, cell_num))
+
+    def calc_percentage(self, cell_num):
+        """ text for '<%>': fills the blank column above with percentages of the numbers in the
+            next column to the left (the ref column), and returns the total, 100.0% """
+        data_rows = self.data_rows()
+        above_cells = [r.cells[cell_num] for r in data_rows]
+        if any((c.text for c in above_cells)) or self.columns[cell_num].hidden_filled:
+            raise ColumnsException('<%> column is not empty')
+        ref_col = cell_num - 1
+        if ref_col < 0:
+            raise ColumnsException('<%> column has no column to the left to reference')
+        ref_column = self.columns[ref_col]
+        if ref_column.total == 0:
+            return '-- %'
+        for above, value in zip(above_cells, ref_column.values):
+            if value is not None:
+                above.set_text(f'{(value / float(ref_column.total)):.1%}')
+        self.columns[cell_num] = Column(above_cells, self.exact)
+        return '100.0%'
+
+    def replace_calc_fields(self):
+        if self.rows[-1].kind == Kinds.footer and self.rows[-1].is_calculated:
+            self.calc_row(self.rows[-1])
+
+    def apply_directives(self):
+        """ Sort the data rows, or keep the top N, by a header cell with <sort>, <sort desc> or <top N>.
+            Runs after the footer is calculated, so it still covers every data row.
+
+            A list item moves with the items under it, and items are sorted among their siblings.
+            An item with no value of its own ranks by the best value under it, the one that sorts first:
+            the largest for <sort desc> and <top N>, the smallest for <sort>.
+            <sort> sorts within each run of rows between blank lines, leaving the blank lines in place.
+            <top N> picks the N top level rows with the largest numbers over the whole table, by a heap,
+            and drops the blank lines.  It needs a numeric column.  Rows with no value, in the cell or
+            under it, go last, and <top N> leaves them out.  nan is no value.
+        """
+        if self.rows[0].kind != Kinds.header:
+            return
+        directive = None
+        for cell_num, cell in enumerate(self.rows[0].cells):
+            m = RE_DIRECTIVE.search(cell.text)
+            if m:
+                if directive:
+                    raise ColumnsException('Only one <sort> or <top N> in a header')
+                directive = (cell_num, m.group(1), m.group(2))
+                cell.set_text(RE_DIRECTIVE.sub(' ', cell.text).strip())
+        if not directive:
+            return
+        cell_num, action, arg = directive
+        if action == 'top' and not (arg or '').isdigit():
+            raise ColumnsException('<top N> needs a number of rows')
+        if action == 'sort' and arg and arg not in ('asc', 'desc'):
+            raise ColumnsException('<sort> is <sort>, <sort asc> or <sort desc>')
+
+        start = 1
+        end = len(self.rows) - 1 if self.rows[-1].kind == Kinds.footer else len(self.rows)
+        list_col = next((c_i for c_i in range(len(self.columns))
+                         if any(row.cells[c_i].list_ for row in self.rows[start:end])), None)
+        is_numeric = self.columns[cell_num].is_numeric()
+        if action == 'top' and not is_numeric:
+            raise ColumnsException('<top N> needs a numeric column')
+        best = min if action == 'sort' and arg != 'desc' else max
+
+        def key(node):
+            cell = node[0].cells[cell_num]
+            value = cell.value if is_numeric else (cell.text.casefold() if cell.text else None)
+            if value != value:
+                value = None  # nan, which compares false with everything, sorts with no value
+            if value is None and node[1]:
+                value = best((k for k in map(key, node[1]) if k is not None), default=None)
+            return value
+
+        if action == 'top':
+            nodes = self.list_tree([row for row in self.rows[start:end] if row.kind == Kinds.data], list_col)
+            ranked = [node for node in nodes if key(node) is not None]
+            body = self.flatten(heapq.nlargest(int(arg), ranked, key=key))
+        else:
+            body, section = [], []
+            for row in self.rows[start:end] + [None]:
+                if row is None or row.kind == Kinds.blank_sep:
+                    body += self.flatten(self.sort_tree(self.list_tree(section, list_col), key, arg == 'desc'))
+                    body += [row] if row else []
+                    section = []
+                else:
+                    section.append(row)
+        self.rows[start:end] = body
+        self.organize_column_lists()
+
+    @staticmethod
+    def list_tree(rows, list_col):
+        """ rows as (row, children) nodes, the children being the rows under a list item """
+        def depth(row):
+            cell = row.cells[list_col] if list_col is not None else None
+            return cell.list_.depth if cell is not None and cell.list_ else 0
+
+        nodes, stack = [], []  # stack of (depth, children list)
+        for row in rows:
+            d = depth(row)
+            while stack and stack[-1][0] >= d:
+                stack.pop()
+            node = (row, [])
+            (stack[-1][1] if stack else nodes).append(node)
+            stack.append((d, node[1]))
+        return nodes
+
+    @classmethod
+    def sort_tree(cls, nodes, key, descending):
+        """ nodes sorted by key, stable, with no value last, and their children sorted too """
+        keyed = [(key(node), node) for node in nodes]
+        valued = sorted((k_n for k_n in keyed if k_n[0] is not None), key=lambda k_n: k_n[0], reverse=descending)
+        return [(row, cls.sort_tree(children, key, descending))
+                for _, (row, children) in valued + [k_n for k_n in keyed if k_n[0] is None]]
+
+    @classmethod
+    def flatten(cls, nodes):
+        return [r for row, children in nodes for r in [row] + cls.flatten(children)]
+
+    def find_column_alignments(self):
+        return [Align.right if column.is_numeric() else Align.left for column in self.columns]
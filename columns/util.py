@@ -0,0 +1,27 @@
+""" Small helpers and exceptions used throughout columns. """
+
+
+def null(*args, **kwargs):
+    pass
+
+
+debug_update_spaces_print = null  # python is cute like that.
+debug_table = null
+
+
+class ColumnsException(Exception):
+    pass
+
+
+class ColumnsLimitExceeded(ColumnsException):
+    def __init__(self, limit, value, bound):
+        self.limit = limit
+        super().__init__(f'{limit} exceeded: {value:,} > {bound:,}')
+
+
+def num_str(num):
+    return f'{num:,}'
+
+
+def tag(name):
+    return f'COLUMNS_TAG:{name.lower()}'  # add stx?
@@ -0,0 +1,139 @@
+""" Watch a directory of markdown files, and render each one to HTML when it changes.
+
+    Changes are found by polling the mtime and size of every *.md file, which works on every
+    platform and costs one stat per file per poll.  A burst of saves is rendered once, after
+    the files have been quiet for the debounce time.  Each file keeps a TableCache, so the
+    tables of an edited file that didn't change aren't parsed again, and a file is rendered
+    again when a CSV or TSV file it includes changes.
+"""
+import os
+from pathlib import Path
+from sys import stderr
+from time import monotonic, perf_counter, sleep
+
+from .cache import TableCache
+
+PAGE = '<html><head><meta charset="UTF-8"></head><body>\n{}\n</body></html>\n'
+
+
+def file_stamp(path):
+    """ (mtime_ns, size) of a file, or None if it is gone """
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+class Watcher:
+    def __init__(self, source, output=None, md=None, interval=0.05, debounce=0.03, verbose=False):
+        """ source is the directory of markdown; HTML goes to the same relative path under output,
+            by default next to each file.  md is the Markdown instance to use, with ColumnsExtension. """
+        if md is None:
+            import markdown
+            from .extension import ColumnsExtension
+            md = markdown.Markdown(extensions=[ColumnsExtension()])
+        self.source = Path(source)
+        self.output = Path(output) if output else self.source
+        self.md = md
+        self.processor = md.parser.blockprocessors['columns']
+        self.interval = interval
+        self.debounce = debounce
+        self.is_verbose = verbose
+        self.files = {}  # path, as str -> (mtime_ns, size) when last rendered
+        self.tables = {}  # path -> TableCache
+        self.depends = {}  # path -> {included path: (mtime_ns, size)}
+        self.pending = {}  # path -> (mtime_ns, size), changed but not yet rendered
+        self.last_change = 0.0
+
+    def verbose(self, message):
+        if self.is_verbose:
+            print(f'Columns: {message}', file=stderr)
+
+    def snapshot(self):
+        """ {path: (mtime_ns, size)} of every markdown file under source, paths as str to keep it quick """
+        found = {}
+        directories = [str(self.source)]
+        while directories:
+            with os.scandir(directories.pop()) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        if not entry.name.startswith('.'):
+                            directories.append(entry.path)
+                    elif entry.name.endswith('.md') and entry.is_file():
+                        st = entry.stat()
+                        found[entry.path] = (st.st_mtime_ns, st.st_size)
+        return found
+
+    def output_path(self, path):
+        return (self.output / Path(path).relative_to(self.source)).with_suffix('.html')
+
+    def render(self, path):
+        tables = self.tables.setdefault(path, TableCache())
+        tables.next_render()
+        self.processor.tables = tables
+        self.processor.included = set()
+        try:
+            html = self.md.convert(Path(path).read_text(encoding='utf-8'))
+        finally:
+            self.processor.tables = None
+            self.md.reset()
+        self.depends[path] = {str(included): file_stamp(included) for included in self.processor.included}
+        out = self.output_path(path)
+        out.parent.mkdir(parents=True, exist_ok=True)
+        out.write_text(PAGE.format(html), encoding='utf-8')
+
+    def remove(self, path):
+        self.files.pop(path, None)
+        self.tables.pop(path, None)
+        self.depends.pop(path, None)
+        try:
+            self.output_path(path).unlink()
+        except FileNotFoundError:
+            pass
+
+    def build(self):
+        """ render every file, and start watching them """
+        self.files = self.snapshot()
+        for path in self.files:
+            self.render(path)
+        return [Path(path) for path in self.files]
+
+    def poll(self, now=None):
+        """ Check for changes once.  Returns the files rendered or removed, once changes have
+            been quiet for the debounce time, else []. """
+        now = monotonic() if now is None else now
+        seen = self.snapshot()
+        for path, stamp in seen.items():
+            if self.files.get(path) != stamp and self.pending.get(path) != stamp:
+                self.pending[path] = stamp
+                self.last_change = now
+        for path, depends in self.depends.items():
+            if path in seen and path not in self.pending and any(file_stamp(dep) != s for dep, s in depends.items()):
+                self.pending[path] = seen[path]  # an included file changed
+                self.last_change = now
+        for path in (self.files.keys() | self.pending.keys()) - seen.keys():
+            if path not in self.pending or self.pending[path] is not None:
+                self.pending[path] = None  # removed
+                self.last_change = now
+        if not self.pending or now - self.last_change < self.debounce:
+            return []
+        done, self.pending = self.pending, {}
+        start = perf_counter()
+        for path, stamp in done.items():
+            if stamp is None:
+                self.remove(path)
+                continue
+            try:
+                self.render(path)
+            except (OSError, UnicodeDecodeError) as e:
+                self.verbose(f'{path}: {e}')  # tried again when it changes
+            self.files[path] = stamp
+        self.verbose(f'rendered {len(done)} files in {(perf_counter() - start) * 1000:.1f} ms')
+        return [Path(path) for path in done]
+
+    def run(self):
+        self.verbose(f'rendered {len(self.build())} files, watching {self.source}')
+        while True:
+            sleep(self.interval)
+            self.poll()
@@ -0,0 +1 @@
+# Lets pytest import columns and samples from the repository root.
@@ -2,6 +2,6 @@ from setuptools import setup
 setup(
     name='columns',
     version='0.1',
-    py_modules=['columns'],
+    packages=['columns'],
     install_requires = ['markdown>=2.5'],
 )
\ No newline at end of file
@@ -0,0 +1,48 @@
+""" Import-time and first-render budgets.  Short-lived render processes pay both on every run,
+    so these fail when a change makes either one slower than its budget.
+    Run this file directly to print the measurements. """
+import subprocess
+import sys
+from pathlib import Path
+
+IMPORT_BUDGET = 0.25  # seconds to import columns
+FIRST_RENDER_BUDGET = 1.0  # seconds to import markdown and columns and render the first table
+RUNS = 3  # best of, to ride out a busy machine
+
+MEASURE = '''
+import sys
+from time import perf_counter
+start = perf_counter()
+import columns
+imported = perf_counter()
+heavy = sorted(name for name in ('pytest', 'markdown', 'xml.etree.ElementTree', 'json', 'mmap', 'csv', 'struct')
+               if name in sys.modules)
+import markdown
+html = markdown.markdown("Fruit   Count\\nApples  3\\nPears   4", extensions=['columns'])
+rendered = perf_counter()
+assert '<table' in html
+print(imported - start, rendered - start, ','.join(heavy))
+'''
+
+
+def measure():
+    """ returns best (import seconds, first render seconds) and modules loaded by importing columns """
+    results = []
+    for _ in range(RUNS):
+        out = subprocess.run([sys.executable, '-c', MEASURE], capture_output=True, text=True, check=True,
+                             cwd=Path(__file__).parent.parent).stdout
+        import_time, render_time, heavy = out.split(' ')
+        results.append((float(import_time), float(render_time), heavy.strip()))
+    return min(r[0] for r in results), min(r[1] for r in results), results[0][2]
+
+
+def test_budgets():
+    import_time, render_time, heavy = measure()
+    assert heavy == '', f'importing columns loaded {heavy}'
+    assert import_time < IMPORT_BUDGET, f'import took {import_time:.3f}s, budget {IMPORT_BUDGET}s'
+    assert render_time < FIRST_RENDER_BUDGET, f'first render took {render_time:.3f}s, budget {FIRST_RENDER_BUDGET}s'
+
+
+if __name__ == '__main__':
+    import_time, render_time, heavy = measure()
+    print(f'import {import_time * 1000:.1f} ms, first render {render_time * 1000:.1f} ms, heavy modules: {heavy or "none"}')
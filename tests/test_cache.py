@@ -0,0 +1,38 @@
+""" Tests of the caches kept across renders. """
+import markdown
+
+from columns import ColumnsExtension
+from columns.cache import RejectionCache
+
+
+def test_rejection_cache():
+    cache = RejectionCache(size=2)
+    blocks = ['a  b', 'not\nthis', 'tail']
+    assert cache.lookup(blocks, 4) is None
+    cache.store(blocks, 2, False, 4, 'Table too short')
+    assert cache.lookup(blocks, 4) == ('Table too short', 2, False)
+    assert cache.lookup(blocks[:2] + ['other tail'], 4)  # only the examined blocks matter
+    assert cache.lookup(['a  b', 'changed'], 4) is None
+    assert cache.lookup(blocks, 8) is None  # other code_indent
+
+    cache.store(['x  y'], 1, True, 4, 'Table too short')  # ran out of blocks
+    assert cache.lookup(['x  y'], 4) and not cache.lookup(['x  y', 'more'], 4)
+    cache.store(['p  q'], 1, False, 4, 'Need at least two columns')
+    assert len(cache.entries) == 2 and cache.lookup(blocks, 4) is None  # oldest dropped
+
+    stats = cache.stats()
+    assert stats['hits'] == 3 and stats['reasons']['Table too short'] == {'hits': 3, 'stores': 2, 'hit_rate': 0.6}
+
+
+def test_rejections_across_renders():
+    doc = 'Some prose  with a wide gap\n\n\nand more\n\n    code  block\n    one  line\n'
+    cache = RejectionCache(size=16)
+    for _ in range(3):
+        md = markdown.Markdown(extensions=[ColumnsExtension(rejection_cache_size=0)])
+        md.parser.blockprocessors['columns'].rejections = cache
+        html = md.convert(doc)
+        assert '<table' not in html and '<pre><code>code  block' in html
+    stats = cache.stats()
+    assert stats['reasons']['Table too short']['hits'] == 2
+    assert stats['reasons']['Need at least two columns']['hits'] == 2
+    assert RejectionCache.shared(16) is RejectionCache.shared(16)
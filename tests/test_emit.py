@@ -0,0 +1,72 @@
+""" Tests of the rendered table and its emitters. """
+import pytest
+
+from columns import (EMITTERS, PACK_VERSION, ColumnsException, PackedTable, RenderedTable, emitter, iter_tables,
+                     render_tables)
+
+DOC = '''Some text
+
+Item            Cost
+----            ----
+- Tools
+  - Saw         12.5
+  - Hammer_     7.5
+
+Parts & bits     80
+----            ----
+Total         <+>
+'''.splitlines()
+
+
+def test_emitters():
+    [outputs] = render_tables(DOC, formats=('html', 'text', 'latex', 'gfm'))
+    assert outputs['text'] == ('Item           Cost\n'
+                               '------------  -----\n'
+                               '- Tools\n'
+                               '  - Saw        12.5\n'
+                               '  - Hammer_     7.5\n'
+                               '\n'
+                               'Parts & bits     80\n'
+                               '------------  -----\n'
+                               'Total         100.0\n')
+    assert outputs['latex'].splitlines()[:3] == ['\\begin{tabular}{lr}', '\\hline', '\\textbf{Item} & \\textbf{Cost} \\\\']
+    assert '\\quad \\textbullet\\ Hammer\\_ & 7.5 \\\\' in outputs['latex']
+    assert 'Parts \\& bits & 80 \\\\\n\\hline\n\\textbf{Total} & \\textbf{100.0} \\\\' in outputs['latex']
+    assert outputs['gfm'].splitlines() == ['| Item | Cost |', '| :--- | ---: |', '| - Tools |  |',
+                                           '| &nbsp;&nbsp;- Saw | 12.5 |', '| &nbsp;&nbsp;- Hammer_ | 7.5 |',
+                                           '| Parts & bits | 80 |', '| **Total** | **100.0** |']
+    assert outputs['html'].startswith('<table class="columns"><thead><tr><th align="left">Item</th>')
+    assert '<span class="depth2"><ul><ul><li>Saw</li></ul></ul></span>' in outputs['html']
+
+    @emitter('cells')
+    def emit_cells(rendered):
+        return ','.join(c.text for row in rendered.rows for c in row.cells if c.text)
+
+    try:
+        [outputs] = render_tables(DOC, formats=('cells',))
+        assert outputs['cells'] == 'Item,Cost,Tools,Saw,12.5,Hammer_,7.5,Parts & bits,80,Total,100.0'
+    finally:
+        del EMITTERS['cells']
+    with pytest.raises(ColumnsException):
+        RenderedTable([], []).emit('pdf')
+
+
+def test_packed_table():
+    [table] = iter_tables(DOC)
+    data = table.pack()
+    packed = PackedTable(data)
+    rendered = RenderedTable.from_table(table)
+    for format_ in EMITTERS:
+        assert packed.emit(format_) == rendered.emit(format_)
+    assert [row.kind for row in packed.rows] == [row.kind for row in table.rows]
+    assert packed.rows[2].cells[0].list_.depth == 2 and packed.rows[-1].cells[1].text == '100.0'
+    assert list(packed.values(1)) == [0.0, 0.0, 12.5, 7.5, 0.0, 80.0, 100.0]
+    assert bytes(packed.valid(1)) == bytes([0, 0, 1, 1, 0, 1, 1]) and packed.values(0) is None
+
+    with pytest.raises(ColumnsException, match='version'):
+        PackedTable(data[:4] + bytes([PACK_VERSION + 1]) + data[5:])
+    table.rows[2].cells[0].list_.depth = 128  # would run into the ordered flag
+    with pytest.raises(ColumnsException, match='too deep'):
+        table.pack()
+    with pytest.raises(ColumnsException, match='truncated'):
+        PackedTable(data[:-16])
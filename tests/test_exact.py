@@ -0,0 +1,83 @@
+""" Exact totals: columns summed as scaled integers rather than floats, and what that costs.
+    Run this file from the repository root, as PYTHONPATH=. python tests/test_exact.py, to print
+    the cost of exact totals against floats and plain Decimals. """
+import random
+from decimal import Decimal
+from time import perf_counter
+
+import markdown
+
+from columns import Cell, Column, ColumnsExtension, Table, get_columns, update_spaces_in_lines
+from columns.patterns import NUMBER_CRUFT
+
+EXACT_BUDGET = 2.0  # parsing a currency table with exact totals, as a multiple of parsing it with floats
+RUNS = 3  # best of, to ride out a busy machine
+
+
+def parse(lines, show_rows=None, exact=False):
+    return Table(lines, get_columns(update_spaces_in_lines(lines, [])), show_rows, exact)
+
+
+def footer(lines, **options):
+    return [c.text for c in parse(lines, **options).rows[-1].cells]
+
+
+def test_exact_totals():
+    lines = ['Item  Cost    Avg    Ratio', '----  ----    ---    -----', 'a     $0.10   0.1', 'b     $0.20   0.2',
+             'c     $0.125  0.4', 'Sum   <+>     <avg>  <+col2>*1.1']
+    assert footer(lines) == ['Sum', '0.42500000000000004', '0.23333333333333336', '0.4675000000000001']
+    assert footer(lines, exact=True) == ['Sum', '0.425', '0.2333333333333333', '0.4675']  # 0.7 / 3 isn't exact
+
+    lines = ['Item  Cost   Pct', '----  ----   ---', 'a     1.5    10.5%', 'b     2.25   1e1%', 'c     1.5e3  2%',
+             'Sum   <+>    <+>', 'Avg   <avg>  <+>*2']
+    table = parse(lines[:-1], exact=True)
+    assert [c.total for c in table.columns[1:]] == [Decimal('1503.75'), Decimal('0.225')]
+    assert footer(lines[:-2] + ['Avg   <avg>  <+>*2'], exact=True) == ['Avg', '501.25', '0.450']
+
+    lines = ['Item  Cost', '----  ----'] + [f'i{n:<4}  0.1' for n in range(1000)] + ['Sum   <+>']
+    assert footer(lines) == ['Sum', '99.9999999999986']
+    assert footer(lines, exact=True) == footer(lines, show_rows=(2, 2), exact=True) == ['Sum', '100.0']
+
+    doc = 'Item  Cost\n----  ----\na     0.1\nb     0.2\nSum   <+>\n'
+    assert '<td align="right">0.3</td>' in markdown.markdown(doc, extensions=[ColumnsExtension(exact_totals=True)])
+
+
+def measure(rows=20_000):
+    """ best seconds to parse a currency table with float and exact totals, and to aggregate a column
+        of its cells with floats, exact totals and plain Decimals """
+    rng = random.Random(1)
+    texts = [f'${rng.randint(0, 10 ** 7) / 100:,.2f}' for _ in range(rows)]
+    lines = ['Item          Cost', '----          ----'] + [f'item{i:<8}  {text:>14}' for i, text in enumerate(texts)]
+    lines.append('Total         <+>')
+    cols = get_columns(update_spaces_in_lines(lines, []))
+    cells = [Cell(text) for text in texts]
+
+    def best(function):
+        times = []
+        for _ in range(RUNS):
+            start = perf_counter()
+            function()
+            times.append(perf_counter() - start)
+        return min(times)
+
+    return {'table float': best(lambda: Table(lines, cols)),
+            'table exact': best(lambda: Table(lines, cols, exact=True)),
+            'column float': best(lambda: Column(cells)),
+            'column exact': best(lambda: Column(cells, exact=True)),
+            'column Decimal': best(lambda: (Column(cells),  # as if Column summed Decimals as it went
+                                            sum(Decimal(cell.text.translate(NUMBER_CRUFT)) for cell in cells)))}
+
+
+def test_exact_cost():
+    times = measure()
+    ratio = times['table exact'] / times['table float']
+    assert ratio < EXACT_BUDGET, f'exact totals took {ratio:.2f} times as long, budget {EXACT_BUDGET}'
+
+
+if __name__ == '__main__':
+    times = measure(100_000)
+    for name, seconds in times.items():
+        print(f'{name:15} {seconds * 1000:8.1f} ms')
+    print(f"parsing a table with exact totals: {times['table exact'] / times['table float']:.2f}x floats; "
+          f"aggregating a column: exact {times['column exact'] / times['column float']:.2f}x floats, "
+          f"plain Decimals {times['column Decimal'] / times['column float']:.2f}x floats")
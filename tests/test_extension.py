@@ -0,0 +1,173 @@
+""" Tests of the markdown block processor, its limits and pathological inputs. """
+import json
+from pathlib import Path
+from time import perf_counter
+
+import markdown
+import pytest
+
+from columns import ColumnsBlockProcessor, ColumnsException, ColumnsExtension, ColumnsLimitExceeded, Limits, Table
+from columns.slowlog import SlowTableLog, replay
+
+
+# noinspection SpellCheckingInspection
+def test_column_block_processor():
+    class MockParser:
+        class mock1:
+            tab_length = 4
+
+        md = mock1()
+
+    def bools(st):
+        return [(True if ch in 'tTx' else False) for ch in st]
+
+    c = ColumnsBlockProcessor(MockParser, verbose=True, code_indent=12)
+    cq = ColumnsBlockProcessor(MockParser, verbose=False, code_indent=12)
+    print("Should print 'is_verbose' once")
+    c.verbose("is_verbose")
+    cq.verbose("is not verbose")
+    with pytest.raises(ColumnsException):
+        raise ColumnsException("Failed")
+    assert c.test(None, "Column with two spaces   Between them")
+    assert not c.test(None, "a b c d")
+
+    assert bools('tft') == [True, False, True]
+    assert c.get_columns(bools('ttttttt')) == []
+    assert c.get_columns(bools('ttttfttt')) == [(4, 5)]
+    assert c.get_columns(bools('t..')) == [(1, 3)]
+    assert c.get_columns(bools('t..t')) == [(1, 3)]
+    assert c.get_columns(bools('.tt..t.t')) == [(0, 1), (3, 7)]
+    assert c.get_columns(bools('t..tt.t.')) == [(1, 3), (5, 8)]
+
+    assert c.update_spaces_in_lines([], []) == []
+    assert c.update_spaces_in_lines(['A   C D', 'A B   D'], []) == bools(' x x x ')
+    assert c.update_spaces_in_lines(['  '], [False]) == [False, True]
+
+    assert c.find_table_extent([]) == (0, [], [])
+    assert c.find_table_extent(['     ']) == (0, [], [])
+    assert c.find_table_extent(['a  b']) == (0, [], [])
+    assert c.find_table_extent(['             a  b\n             a  b']) == (0, [], [])
+    b1 = ['a  b\n1  2', '3  4\n5  6', '\nNot in Table']  # double space
+    blocks_used, lines_in_table, cols = cq.find_table_extent(b1)
+    assert blocks_used == 2 and lines_in_table == ['a  b', '1  2', '', '3  4', '5  6'] and cols == [(0, 1), (3, 4)]
+    b1 = ['a  b\n1  2', '3  4\n5  6', '', 'Not in Table']  # triple space
+    blocks_used, lines_in_table, cols = cq.find_table_extent(b1)
+    assert blocks_used == 2 and lines_in_table == ['a  b', '1  2', '', '3  4', '5  6'] and cols == [(0, 1), (3, 4)]
+
+
+def test_check_list():
+    assert ColumnsBlockProcessor.check_list('  * Foobar') == (True, False, 2, 'Foobar')
+    assert ColumnsBlockProcessor.check_list('  9.    Foobar') == (True, True, 2, 'Foobar')
+    assert ColumnsBlockProcessor.check_list('  Foobar') == (False, False, 0, '')
+    assert ColumnsBlockProcessor.check_list('*Foobar') == (False, False, 0, '')
+
+
+def test_limits():
+    class MockParser:
+        class mock1:
+            tab_length = 4
+
+        md = mock1()
+
+    c = ColumnsBlockProcessor(MockParser, verbose=False, code_indent=4,
+                              limits=Limits(max_line_width=20, max_rows=3, max_columns=2, max_cells=None))
+    assert c.find_table_extent(['a  b\nc  d']) == (1, ['a  b', 'c  d'], [(0, 1), (3, 4)])
+    for blocks, limit in [(['a  b\nc  d  ' + 'x' * 20], 'max_line_width'),
+                          (['a  b\nc  d', 'e  f'], 'max_rows'),
+                          (['a  b  c\nd  e  f'], 'max_columns')]:
+        with pytest.raises(ColumnsLimitExceeded) as e:
+            c.find_table_extent(blocks)
+        assert e.value.limit == limit
+    with pytest.raises(ColumnsLimitExceeded) as e:
+        c.update_spaces_in_lines(['a  b'], [], deadline=perf_counter() - 1)
+    assert e.value.limit == 'time_budget'
+    with pytest.raises(ColumnsLimitExceeded) as e:
+        Table(['a  b', 'c  d'], [(0, 1), (3, 4)], deadline=perf_counter() - 1)
+    assert e.value.limit == 'time_budget'
+
+    # a long paragraph after a table isn't part of it, so doesn't put it over a limit
+    assert c.find_table_extent(['a  b\nc  d', 'x ' * 20]) == (1, ['a  b', 'c  d'], [(0, 1), (3, 4)])
+    md = markdown.Markdown(extensions=[ColumnsExtension()])
+    html = md.convert('Item  Qty\na       1\nb       2\n\n' + 'word ' * 250)
+    assert html.count('<table') == 1 and not md.parser.blockprocessors['columns'].limit_counts
+
+    doc = '\n'.join(f'row{i}  {i}' for i in range(5))
+    md = markdown.Markdown(extensions=[ColumnsExtension(max_rows=3)])
+    for renders in (1, 2):  # the second is from the rejection cache, and counts the same
+        assert '<table' not in md.convert(doc)
+        assert md.parser.blockprocessors['columns'].limit_counts == {'max_rows': renders}
+    md = markdown.Markdown(extensions=[ColumnsExtension(max_rows=3)])
+    md.convert(doc)
+    assert md.parser.blockprocessors['columns'].limit_counts == {'max_rows': 1}
+
+
+def pathological_corpus():
+    """ name, markdown text pairs that are expensive to detect without limits """
+    return [
+        ('long line', 'a  b\n' + 'x  ' * 200_000),
+        ('single spaced tokens', '\n'.join(' '.join(['tok'] * 2000) + '  end' for _ in range(200))),
+        ('many blocks', '\n\n'.join(['a  b\nc  d'] * 20_000)),
+        ('many columns', '\n'.join('  '.join(['c'] * 3000) for _ in range(50))),
+        ('tall table', '\n'.join(f'row{i:<6}  {i}' for i in range(200_000))),
+    ]
+
+
+def test_pathological_inputs():
+    for name, text in pathological_corpus():
+        md = markdown.Markdown(extensions=[ColumnsExtension(max_line_width=500, max_rows=2000, max_columns=50,
+                                                            max_cells=20_000, time_budget=0.5)])
+        start = perf_counter()
+        html = md.convert(text)
+        elapsed = perf_counter() - start
+        counts = md.parser.blockprocessors['columns'].limit_counts
+        assert elapsed < 10, f'{name} took {elapsed:.1f}s'
+        assert sum(counts.values()) >= 1, name
+        assert html.count('<table') <= 1, name  # only the tail of 'many blocks' fits the limits
+
+
+def test_virtual_rows():
+    lines = ['Item        Qty', '----'] + [f'item{i:<6}  {i:>4}' for i in range(50)]
+    lines[30:30] = ['', '* parent      1', '  1. <x>       2']
+    md = markdown.Markdown(extensions=[ColumnsExtension(virtual_rows=10)])
+    html = md.convert('\n'.join(lines))
+    table, scripts = html.split('</table>')
+    assert table.count('<tr') == 11  # header and 10 rows
+    assert scripts.count('function columnsVirtualRows') == 1 and 'columnsVirtualRows(document.currentScript)' in scripts
+    payload = json.loads(scripts.split('class="columns-rows" type="application/json">')[1].split('</script>')[0])
+    assert payload['a'] == [0, 1] and len(payload['r']) == 43
+    assert payload['r'][:2] == [['item10', '10'], ['item11', '11']]
+    assert payload['r'][18:21] == [0, [['parent', 1, 0, 1], '1'], [['<x>', 2, 1, 1], '2']]
+    assert '<x>' not in scripts  # escaped, so it can't close the script
+    assert markdown.Markdown(extensions=[ColumnsExtension()]).convert('\n'.join(lines)).count('<tr') == 54
+
+    md.reset()  # a reused instance gives every document its own script and style
+    assert md.convert('\n'.join(lines)) == html
+    md = markdown.Markdown(extensions=[ColumnsExtension(style='blue')])
+    assert md.convert('\n'.join(lines)).count('<style>') == 1
+    md.reset()
+    assert md.convert('\n'.join(lines)).count('<style>') == 1
+
+
+def test_slow_log(tmp_path):
+    doc = 'Item        Qty\n----        ---\n* parent      1\n  1. child    2\nTotal       <+>\n'
+    md = markdown.Markdown(extensions=[ColumnsExtension(slow_table_ms=1e-6, slow_table_dir=str(tmp_path))])
+    md.convert(doc)
+    [entry] = md.parser.blockprocessors['columns'].slow_log.entries
+    assert set(entry['ms']) == {'detect', 'parse', 'render'}
+    assert entry['shape'] == {'rows': 4, 'columns': 2, 'max_line_width': 15, 'list_depth': 2, 'placeholders': ['<+>']}
+    reproducer = Path(entry['reproducer'])
+    assert reproducer.read_text() == doc and json.loads(reproducer.with_suffix('.json').read_text()) == entry
+    [(path, seconds)] = replay(tmp_path)
+    assert path == reproducer
+
+    log = SlowTableLog(0, tmp_path, max_bytes=1000)  # room for three of these tables and their entries
+    for n in range(5):
+        log.record([f'Table{n}  Qty', '------  ---', 'a         1'], [(0, 6), (8, 11)], None, {'detect': 0.001})
+    kept = sorted(p.name for p in tmp_path.glob('*.md'))
+    assert len(kept) == 3 and Path(log.entries[-1]['reproducer']).name in kept
+    assert sum(p.stat().st_size for p in tmp_path.iterdir()) <= 1000
+
+    md = markdown.Markdown(extensions=[ColumnsExtension(slow_table_ms=1e-6, time_budget=0)])
+    assert '<table' not in md.convert(doc)
+    [entry] = md.parser.blockprocessors['columns'].slow_log.entries
+    assert entry['limit'] == 'time_budget' and entry['reproducer'] is None
@@ -0,0 +1,72 @@
+""" Tests of tables included from CSV and TSV files. """
+import os
+
+import markdown
+import pytest
+
+from columns import ColumnsException, ColumnsExtension, Kinds, Limits, ColumnsLimitExceeded
+from columns import include
+from columns.cache import IncludeCache
+from columns.watch import Watcher
+
+CSV = 'State,Population,Share\nCalifornia,39.5,\n"Texas, TX",29.0,\n,,\nOhio,11.8,\n<#>,<+>,<%>\n'
+
+
+def test_load_table(tmp_path, monkeypatch):
+    (tmp_path / 'pop.csv').write_text(CSV)
+    table = include.load_table(tmp_path / 'pop.csv')
+    assert [r.kind for r in table.rows] == [Kinds.header, Kinds.data, Kinds.data, Kinds.blank_sep, Kinds.data,
+                                            Kinds.footer]
+    assert [c.text for c in table.rows[2].cells] == ['Texas, TX', '29.0', '36.1%']
+    assert [c.text for c in table.rows[-1].cells] == ['3', '80.3', '100.0%']
+
+    (tmp_path / 'pop.tsv').write_text('\ufeff' + CSV.replace(',', '\t').replace('"Texas\t TX"', 'Texas'))
+    monkeypatch.setattr(include, 'MMAP_SIZE', 0)  # read through a memory map
+    table = include.load_table(tmp_path / 'pop.tsv', show_rows=(1, 1))
+    assert [r.kind for r in table.rows][:3] == [Kinds.header, Kinds.data, Kinds.elided]
+    assert table.rows[0].cells[0].text == 'State' and table.rows[-1].cells[1].text == '80.3'
+
+    with pytest.raises(ColumnsLimitExceeded):
+        include.load_table(tmp_path / 'pop.csv', limits=Limits(max_rows=3))
+    (tmp_path / 'text.csv').write_text('Task,Hours\n- pending,3\n<+>,2\nlast,1\n')
+    table = include.load_table(tmp_path / 'text.csv')  # data cells are text, not list items or placeholders
+    assert [r.kind for r in table.rows] == [Kinds.header, Kinds.data, Kinds.data, Kinds.data]
+    assert [c.text for c in table.rows[1].cells] == ['- pending', '3'] and table.rows[1].cells[0].list_ is None
+    assert table.rows[2].cells[0].text == '<+>' and table.columns[1].total == 6
+    with pytest.raises(ColumnsLimitExceeded):
+        include.load_table(tmp_path / 'text.csv', limits=Limits(max_line_width=10))
+    (tmp_path / 'quoted.csv').write_text('\ufeff"Name",Amount\nx,1\n', encoding='utf-8')
+    for mmap_size in (0, 1 << 20):
+        monkeypatch.setattr(include, 'MMAP_SIZE', mmap_size)
+        assert include.load_table(tmp_path / 'quoted.csv').rows[0].cells[0].text == 'Name'  # no byte order mark
+    (tmp_path / 'one.csv').write_text('a\nb\n')
+    with pytest.raises(ColumnsException):
+        include.load_table(tmp_path / 'one.csv')
+    with pytest.raises(ColumnsException):
+        include.resolve(tmp_path / 'sub', '../pop.csv')
+
+
+def test_include_directive(tmp_path):
+    (tmp_path / 'pop.csv').write_text(CSV)
+    doc = 'Populations:\n\n{{table pop.csv}}\n\n{{table missing.csv}}\n'
+    assert '<table' not in markdown.markdown(doc, extensions=[ColumnsExtension()])  # off by default
+
+    cache = IncludeCache.shared(64)
+    hits = cache.hits
+    for _ in range(2):
+        md = markdown.Markdown(extensions=[ColumnsExtension(include_dir=str(tmp_path))])
+        html = md.convert(doc)
+        assert html.count('<table') == 1 and '<td align="right">80.3</td>' in html
+        assert '<p>{{table missing.csv}}</p>' in html
+    assert cache.hits == hits + 1
+
+    source = tmp_path / 'docs'
+    source.mkdir()
+    (source / 'page.md').write_text('{{table pop.csv}}\n')
+    watcher = Watcher(source, md=markdown.Markdown(extensions=[ColumnsExtension(include_dir=str(tmp_path))]))
+    watcher.build()
+    (tmp_path / 'pop.csv').write_text(CSV.replace('11.8', '12.8'))
+    os.utime(tmp_path / 'pop.csv', ns=(1, 1))
+    watcher.poll(now=1.0)
+    assert watcher.poll(now=2.0) == [source / 'page.md']  # rendered again when its include changed
+    assert '81.3' in (source / 'page.html').read_text()
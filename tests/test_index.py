@@ -0,0 +1,54 @@
+""" Tests of the sidecar table index of big markdown files. """
+import os
+
+from columns import RenderedTable, TableIndex, build_index, iter_tables
+from columns.__main__ import main
+from columns.index import index_path
+
+DOC = '''# Prices
+
+Some text, and a table.
+
+Fruit     Price
+-----     -----
+Apple       1.5
+Pear        2.0
+
+More text.
+
+Città     Abitanti
+-----     --------
+Roma       2873000
+Milano     1352000
+
+----      --------
+Totale    <+>
+
+Item   Count
+Saw        2
+'''
+
+
+def test_index(tmp_path, capsys):
+    path = tmp_path / 'big.md'
+    path.write_bytes(DOC.replace('\n', '\r\n').encode('utf-8'))
+    tables = build_index(path)
+    assert index_path(path).exists()
+    assert [(e.line, e.lines, e.header) for e in tables.entries] == [
+        (4, 4, ['Fruit', 'Price']), (11, 7, ['Città', 'Abitanti']), (19, 2, None)]
+
+    expected = list(iter_tables(DOC.splitlines()))
+    tables = TableIndex.open(path)  # from the sidecar
+    for n, table in enumerate(expected):
+        assert tables.render(n, 'text') == RenderedTable.from_table(table).emit('text')
+    assert tables.find('Abitanti') == 1 and tables.find('^Fruit') == 0 and tables.find('Nothing') is None
+    assert tables.table(1).rows[-1].cells[1].text == '4,225,000.0'
+
+    path.write_text(DOC.replace('Some text, and a table.', 'Some text.\n\nAnd a table.'), encoding='utf-8')
+    os.utime(path, ns=(0, 0))  # changed, even within the clock's resolution
+    assert TableIndex.open(path).entries[0].line == 6  # built again
+
+    main(['index', str(path)])
+    assert capsys.readouterr().out.splitlines()[1] == '1\tline 14\t7 lines\tCittà  Abitanti'
+    main(['index', str(path), '--header', 'Fruit'])
+    assert capsys.readouterr().out.startswith('Fruit  Price\n')
@@ -0,0 +1,74 @@
+""" Tests of streaming table detection. """
+from pathlib import Path
+
+import markdown
+
+import samples
+from columns import ColumnType, ColumnsExtension, iter_tables, scan_document
+from columns.patterns import FILL
+from columns.scan import display_line
+
+
+RAW_DOCS = ['<div>\nName      Qty\nApples      3\n</div>\n\nA  B\nc  d',
+            'Text\n\n```\nName      Qty\n\nApples      3\n```',
+            'a  b\nc  d\n<div class="x">\n<p>e  f\ng  h</p>\n</div>\ni  j\nk  l',
+            'Text\n<!-- a\n\nb  c\nd  e\n-->\nx  y\nz  w',
+            '```\nunclosed  x\n\nA  B\nc  d', '<!-- unclosed\n\nA  B\nc  d', '<hr>\nA  B\nc  d', '<div>\nA  B\nc  d']
+
+
+def test_iter_tables():
+    docs = [samples.sample1, samples.sample2, samples.sample4, samples.sample9, (Path(__file__).parent.parent / 'readme.md').read_text()]
+    for doc in docs + RAW_DOCS:
+        rendered = []
+        md = markdown.Markdown(extensions=['fenced_code', ColumnsExtension()])
+        processor = md.parser.blockprocessors['columns']
+        processor.render_table_into_parent = lambda parent, table: rendered.append(table)
+        md.convert(doc)
+        streamed = list(iter_tables(doc.splitlines()))
+        assert [[c.text for r in t.rows for c in r.cells] for t in streamed] == \
+               [[c.text for r in t.rows for c in r.cells] for t in rendered], doc
+
+    segments = list(scan_document(['intro', '', 'a  b', 'c  d', '', 'e  f', '', '', 'g  h', 'i  j', '\t']))
+    assert [(s.start, s.end, bool(s.table)) for s in segments] == [(0, 1, False), (2, 6, True), (8, 10, True)]
+    assert segments[1].lines == ['a  b', 'c  d', '', 'e  f'] and segments[1].cols == [(0, 1), (3, 4)]
+
+    def endless():
+        yield from ['a  b', 'c  d', '', 'not a table']
+        while True:
+            yield from ['more text', '']
+
+    table = next(iter_tables(endless()))  # streams: the first table comes out before the input ends
+    assert [c.text for c in table.rows[1].cells] == ['c', 'd']
+
+
+def test_display_width():
+    wide = ['果物      数  色', '--------  --  ----', 'りんご    3   赤い', 'みかん🍊  5   橙']
+    table = next(iter_tables(wide))
+    assert [[c.text for c in row.cells] for row in table.rows[1:]] == [['りんご', '3', '赤い'], ['みかん🍊', '5', '橙']]
+
+    tabbed = ['Key\tValue', 'abc\t1', 'de\t2', 'f\t3', '\t4']  # 'abc' is one space from the tab stop
+    table = next(iter_tables(tabbed))
+    assert [[c.text for c in row.cells] for row in table.rows] == [['Key', 'Value'], ['abc', '1'], ['de', '2'],
+                                                                   ['f', '3'], ['', '4']]
+
+    line = 'plain ascii'
+    assert display_line(line) is line
+    assert display_line('名\tx') == '名' + FILL + '  x'
+
+    html = markdown.markdown('\n'.join(tabbed), extensions=[ColumnsExtension()])
+    assert '<td align="left">de</td>\n<td align="left">2</td>' in html
+    code = markdown.markdown('```\nabc\td\n```', extensions=['fenced_code', ColumnsExtension()])
+    assert 'abc d' in code  # code keeps markdown's own tab expansion
+    assert markdown.markdown('<pre>\nabc\td\n</pre>', extensions=[ColumnsExtension()]) == '<pre>\nabc d\n</pre>'
+
+    # cells keep their text as written: combining marks count no columns, and nothing is normalized
+    marks = ['Name        Qty', '----        ---', '\uf900 cafe\u0301     1', 'q\u0303 x\u0303         2']
+    assert len(display_line(marks[2])) == len('\uf900') + 2 + len('café     1')
+    table = next(iter_tables(marks))
+    assert [row.cells[0].text for row in table.rows[1:]] == ['\uf900 cafe\u0301', 'q\u0303 x\u0303']
+
+    lines = ['Name  Qty', '----  ---'] + [f'n{i}    １２' for i in range(5)] + ['Sum   <+>']
+    for show_rows in (None, (1, 1)):  # hidden rows are read from display lines too
+        table = next(iter_tables(lines)) if show_rows is None else \
+            next(scan_document(lines, show_rows=show_rows)).table
+        assert table.rows[-1].cells[1].text == '60.0' and table.col_types[1] == ColumnType.integer
@@ -0,0 +1,76 @@
+""" Tests of the HTTP render service. """
+import json
+from http.client import HTTPConnection
+from threading import Thread
+
+import pytest
+
+from columns.__main__ import extension_configs
+from columns.server import RenderService, etag_matches, make_server
+
+DOC = 'Name  Amt\n----  ---\na       1\nb       2\n'
+
+
+@pytest.fixture
+def server():
+    server = make_server(port=0, service=RenderService({'style': 'default'}, pool_size=2, cache_size=4))
+    thread = Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_render_service(server, monkeypatch):
+    conn = HTTPConnection(*server.server_address[:2], timeout=5)  # one connection for every request
+    conn.request('POST', '/render', DOC.encode())
+    response = conn.getresponse()
+    html = response.read().decode()
+    etag = response.getheader('ETag')
+    assert response.status == 200 and '<table class="columns">' in html and etag.startswith('"')
+
+    conn.request('POST', '/render', DOC.encode(), {'If-None-Match': etag})
+    response = conn.getresponse()
+    assert response.status == 304 and response.read() == b''
+    conn.request('POST', '/render', DOC.encode())
+    response = conn.getresponse()
+    assert response.read().decode() == html and response.getheader('ETag') == etag
+
+    conn.request('GET', '/stats')
+    stats = json.loads(conn.getresponse().read())
+    assert stats['counts'] == {'requests': 3, 'renders': 1, 'not_modified': 1}
+    assert stats['render_cache']['hits'] == 1 and stats['latency']['render']['count'] == 1
+    conn.request('GET', '/nothing')
+    response = conn.getresponse()
+    assert response.status == 404 and response.read() == b'Not found\n'
+    conn.request('POST', '/nothing', b'GET /stats HTTP/1.1\r\nHost: x\r\n\r\n')  # a body, not a request
+    response = conn.getresponse()
+    assert response.status == 404 and response.read() == b'Not found\n'
+    conn.request('POST', '/render', DOC.encode())
+    assert conn.getresponse().read().decode() == html
+    conn.request('POST', '/render', b'', {'Content-Length': '-1'})
+    response = conn.getresponse()
+    assert response.status == 400 and response.getheader('Connection') == 'close'
+    conn.close()
+
+    def fail(text, etag=None):
+        raise ValueError(text)
+
+    monkeypatch.setattr(server.RequestHandlerClass.service, 'render', fail)
+    conn = HTTPConnection(*server.server_address[:2], timeout=5)
+    conn.request('POST', '/render', b'Broken')
+    response = conn.getresponse()
+    assert response.status == 500 and response.read() == b'Render failed\n'
+    conn.request('GET', '/stats')  # the same connection still works
+    assert json.loads(conn.getresponse().read())['counts']['errors'] == 2
+    conn.close()
+
+    blue = RenderService({'style': 'blue', 'virtual_rows': 1}, pool_size=1)  # one instance, reused
+    for text in (DOC, DOC + '\nMore.\n'):
+        html = blue.render(text)[1]
+        assert html.count('<style>') == 1 and html.count('function columnsVirtualRows') == 1
+
+    other = RenderService({'style': 'blue'}, pool_size=0)
+    assert other.etag(DOC) != server.RequestHandlerClass.service.etag(DOC)  # config is part of the ETag
+    assert etag_matches(f'"x", W/{etag}', etag) and etag_matches('*', etag) and not etag_matches('"x"', etag)
+    assert extension_configs(['show-first-rows=5', 'verbose=yes']) == {'show_first_rows': 5, 'verbose': True}
@@ -0,0 +1,42 @@
+""" Tests of streaming HTML output. """
+from pathlib import Path
+
+import markdown
+import pytest
+
+import samples
+from columns import ColumnsException, ColumnsExtension, iter_html
+
+
+def test_iter_html():
+    for doc in [samples.sample1, samples.sample4, samples.sample9, (Path(__file__).parent.parent / 'readme.md').read_text()]:
+        expected = markdown.Markdown(extensions=[ColumnsExtension()]).convert(doc)
+        for batch_rows in (500, 3):
+            assert ''.join(iter_html(doc.splitlines(), batch_rows=batch_rows)) == expected
+
+    lines = ['Intro', '', 'Name  Value', '----  -----'] + [f'n{i}    {i}' for i in range(10)] + ['', 'The end']
+    md = markdown.Markdown(extensions=['extra', ColumnsExtension(show_first_rows=2, show_last_rows=2)])
+    chunks = list(iter_html(lines, md, batch_rows=2))
+    assert ''.join(chunks) == md.convert('\n'.join(lines))
+    assert chunks[0] == '<p>Intro</p>' and chunks[1].startswith('\n<table class="columns">')
+    assert chunks[-1] == '\n<p>The end</p>' and chunks[-2].endswith('</table>')
+
+    raw = ['<div>\nName      Qty\nApples      3\n</div>', 'Text\n\n```\nName      Qty\n\nApples      3\n```',
+           'a  b\nc  d\n\n<div>\nx\n</div>\n\ne  f\ng  h\n\n<!-- c\n\ni  j\n-->\n\n```\nm  n\n```\n\no  p\nq  r',
+           'Name  Qty\na       1\nb       2\n\n[x]: http://example.com',  # the reference converts to nothing
+           # text that would be a table in a run alone, but in the document goes on into the next table
+           'Name     Amt\n-----\nAl       10\n\nBo       20\n-----\n<#>      <+>\n\na  b\nc  d\n']
+    for doc in raw:
+        for extensions in ([], ['fenced_code']):
+            md = markdown.Markdown(extensions=extensions + [ColumnsExtension()])
+            expected = md.convert(doc)
+            assert ''.join(iter_html(doc.splitlines(), md, batch_rows=1)) == expected, doc
+
+    def endless():
+        yield from ['a  b', 'c  d', '']
+        while True:
+            yield from ['more text', '']
+
+    assert next(iter_html(endless())).startswith('<table')  # sent before the input ends
+    with pytest.raises(ColumnsException):
+        next(iter_html(lines, markdown.Markdown()))
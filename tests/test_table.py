@@ -0,0 +1,293 @@
+""" Tests of the table model: lexing, typing and footer calculation. """
+import io
+import json
+from array import array
+
+import pytest
+
+from columns.footer import Field, compile_footer
+from columns import (Align, Cell, Column, ColumnsException, ColumnType, Kinds, Shape, Table, TableRow, get_columns,
+                     lex_number, parse_numbers, update_spaces_in_lines)
+
+
+# noinspection PyProtectedMember
+def test_utils():
+    g1 = ['-$23,123.45', '-23_123.45', '-2312345%']
+    g2 = [' .302  ', '   $ 0,000,000,000.302000  ', '  30.2%   ', '30.2 %', ' *23*']
+    g3 = ['  n/a  ', 'NA', '--', '', '   ']
+    g4 = ['  text ', '234 USD', 'about 23.4', '(23.4)', '23.4-']
+
+    assert all([Cell(s).is_numeric_column_like() for s in [*g1, *g2, *g3]])
+    assert not any([Cell(s).is_numeric_column_like() for s in [*g4]])
+    assert all([Cell(s).is_number() for s in [*g1, *g2]])
+    assert not any([Cell(s).is_number() for s in [*g3, *g4]])
+    assert all([Cell(s).as_number() == -23123.45 for s in g1])
+    assert all([Cell(s).as_number() == 0 for s in [*g3, *g4]])
+    assert all([Cell(s)._try_number() is None for s in [*g3, *g4]])
+    assert all([Cell(s)._try_number() is not None for s in [*g1, *g2]])
+    assert all([Cell(s).is_countable() for s in [*g1, *g2, *g4]])
+    assert not any([Cell(s).is_countable() for s in g3])
+
+
+def test_lexer():
+    assert lex_number('-$23,123.45') == (Shape.currency, -23123.45)
+    assert lex_number(' 30.2 %') == (Shape.percent, 0.302)
+    assert lex_number('1_000') == (Shape.integer, 1000.0)
+    assert lex_number('1e3') == (Shape.decimal, 1000.0)
+    assert lex_number(' n/a ') == (Shape.ignorable, None)
+    assert lex_number('23.4-') == (Shape.text, None)
+    c = Cell('  - <+> of <#>')
+    assert c.list_ and c.text == '<+> of <#>' and c.placeholders == ('+', '#')
+    c = Cell('---')
+    assert not c.list_ and c.is_separator and not c.is_decorated and c.shape == Shape.ignorable
+    t = TableRow('_One_   ===   <avg>', [(0, 5), (8, 11), (14, 19)])
+    assert not t.is_blank and not t.is_separator and not t.is_decorated and t.is_calculated
+    assert [c.shape for c in t.cells] == [Shape.text, Shape.text, Shape.text]
+    assert TableRow('   ', [(0, 1), (2, 3)]).is_blank
+
+
+def test_parse_numbers():
+    texts = ['-$23,123.45', '-23_123.45', '-2312345%', ' .302  ', '   $ 0,000,000,000.302000  ', '30.2 %',
+             ' *23*', '  n/a  ', 'NA', '--', '', '   ', '  text ', '234 USD', 'about 23.4', '(23.4)', '23.4-',
+             '1e3', '-inf', 'nan%', '١٢']
+    values, valid, percent = parse_numbers(texts)
+    assert len(values) == len(valid) == len(percent) == len(texts)
+    for text, value, is_valid, is_percent in zip(texts, values, valid, percent):
+        expected = Cell(text)._try_number()
+        assert bool(is_valid) == (expected is not None) and bool(is_percent) == ('%' in text), text
+        if expected is not None and expected == expected:  # skip nan
+            assert value == expected, text
+    assert parse_numbers([]) == (array('d'), bytearray(), bytearray())
+
+
+def test_cell():
+    c = Cell('   foo ')
+    assert c.text == 'foo' and not c.list_
+    c = Cell('  +    bar  ')
+    assert c.text == 'bar' and c.list_ and not c.list_.is_ordered and c.list_.indent == 2
+    c = Cell('12.  baz')
+    assert c.text == 'baz' and c.list_ and c.list_.is_ordered and c.list_.indent == 0
+
+
+def test_table_line():
+    t = TableRow('', [])
+    assert not t.is_all_decorated() and not t.is_all_separator() and not t.has_calculated()
+    t = TableRow('    ', [(0, 1), (3, 4)])
+    assert not t.is_all_decorated() and not t.is_all_separator() and not t.has_calculated()
+    t = TableRow('a  b', [(0, 1), (3, 4)])
+    assert t.text == 'a  b' and t.cells[0].text == 'a' and t.cells[1].text == 'b'
+    assert not t.is_all_decorated() and not t.is_all_separator() and not t.has_calculated()
+    t = TableRow('One   Space <#> Two', [(0, 3), (5, 21), (30, 35)])
+    assert t.cells[0].text == 'One' and t.cells[1].text == 'Space <#> Two' and t.cells[2].text == ''
+    assert not t.is_all_decorated() and not t.is_all_separator() and t.has_calculated()
+    t = TableRow('_One_    *Space Two*', [(0, 7), (9, 20), (30, 35)])
+    assert t.is_all_decorated() and not t.is_all_separator() and not t.has_calculated()
+    t = TableRow('-  -', [(0, 1), (3, 4), (15, 16)])
+    assert not t.is_all_decorated() and t.is_all_separator() and not t.has_calculated()
+    t = TableRow('=   ==', [(0, 1), (3, 5), (15, 16)])
+    assert t.is_all_separator()
+
+
+def test_table():
+    # test creation and parse
+    t1 = Table(['a  b', 'c  d'], [(0, 1), (3, 4)])
+    assert t1.rows[0].kind == Kinds.data
+
+    lines1 = ['_Name_     _Amt_',
+              '-----',
+              'Alice       30',
+              'Bob         40',
+              '              ',
+              'Charlie    -10',
+              '--------   ---',
+              '<#>;<avg>   <+>    <%>']
+    #          01234567890123456789
+    cols1 = [(0, 9), (11, 16), (18, 22)]
+    t = Table(lines1, cols1)
+    assert ''.join((c.text for c in t.rows[0].cells)) == '_Name__Amt_'
+    assert len(t.rows[0].cells) == 3
+
+    assert t.rows[0].kind == Kinds.header and t.rows[-1].kind == Kinds.footer
+    assert t.rows[1].kind == Kinds.data
+    assert t.rows[3].kind == Kinds.blank_sep
+
+    assert t.rows[-1].cells[0].text == '3;--'
+    assert t.rows[1].cells[2].text == '50.0%'
+
+    assert t.col_alignment[0] == Align.left and t.col_alignment[1] == Align.right
+
+
+def test_column_types():
+    lines = ['Id  When        Qty  Cost     Share  Note',
+             '--  ----        ---  ----     -----  ----',
+             '1   2020-01-02  3    $1.50    10%    a',
+             '2   2020-02-03  4.5  $2       n/a    7',
+             '3   1/4/2021    -    $3.25    5%     c']
+    cols = [(0, 2), (4, 14), (16, 19), (21, 26), (30, 35), (37, 41)]
+    t = Table(lines, cols)
+    assert t.col_types == [ColumnType.integer, ColumnType.date, ColumnType.decimal, ColumnType.currency,
+                           ColumnType.percentage, ColumnType.text]
+    assert t.col_alignment == [Align.right, Align.left, Align.right, Align.right, Align.right, Align.left]
+    qty = t.columns[2]
+    assert qty.values == [3, 4.5, None] and qty.count == 2 and qty.numbers == 2 and qty.total == 7.5
+    assert Column.combine_types({ColumnType.percentage, ColumnType.integer}) == ColumnType.mixed
+    assert Column([]).type_ == ColumnType.empty and Column([]).is_numeric()
+
+
+def test_list_table():
+    lines1 = ['_Name_     _Amt_',
+              '-----',
+              'Alice       30',
+              '* Bob       40',
+              '  * C2       4  ',
+              'Charlie    -10',
+              '  1. D2      3 ',
+              '--------   ---',
+              '<#>;<avg>   <+>    <%>']
+    #          01234567890123456789
+    cols1 = [(0, 9), (11, 16), (18, 22)]
+    t = Table(lines1, cols1)
+    assert not t.rows[2].cells[0].list_.is_ordered
+    assert t.rows[3].cells[0].list_.depth == 2
+    l = t.rows[5].cells[0].list_
+    assert l.is_ordered and l.order_sequence == 1
+
+
+def test_show_rows():
+    lines = ['Name      Amt    Share',
+             '----      ---',
+             *[f'row{i:<5}  {i:>4}' for i in range(1, 1001)],
+             '',
+             'n/a        -',
+             '--------  ---',
+             '<#>       <+>;<avg>      <%>']
+    cols = get_columns(update_spaces_in_lines(lines, []))
+    full = Table(lines, cols)
+    t = Table(lines, cols, show_rows=(3, 2))
+    assert [r.kind for r in t.rows] == [Kinds.header] + [Kinds.data] * 3 + [Kinds.elided] + \
+           [Kinds.data, Kinds.blank_sep, Kinds.data, Kinds.footer]
+    assert t.hidden_rows == 996 and t.rows[4].text == '… 996 more rows'
+    assert [c.text for c in t.rows[-1].cells] == [c.text for c in full.rows[-1].cells] == \
+           ['1,000', '500,500.0;500.5', '100.0%']
+    assert t.rows[1].cells[2].text == full.rows[1].cells[2].text == '0.0%'
+    assert t.columns[1].count == full.columns[1].count and t.col_types == full.col_types
+    assert len(t.columns[1].values) == 5 and t.columns[1].hidden == 996
+
+    assert Table(lines, cols, show_rows=(600, 600)).hidden_rows == 0  # nothing to hide
+    bad = lines[:500] + ['x  <+>'] + lines[500:]
+    with pytest.raises(ColumnsException):
+        Table(bad, cols, show_rows=(3, 2))
+
+
+def test_export():
+    lines = ['Name      Amt    Share',
+             '----      ---',
+             *[f'row{i:<5}  {i:>4}' for i in range(1, 11)],
+             '- a,"b"     5',
+             '  - c      n/a',
+             '--------  ---',
+             '<#>       <+>      <%>']
+    t = Table(lines, get_columns(update_spaces_in_lines(lines, [])), show_rows=(2, 2))
+    out = io.StringIO(newline='')
+    t.write_csv(out)
+    assert out.getvalue().splitlines() == ['kind,Name,Amt,Share,Name depth', 'data,row1,1,1.7%,0', 'data,row2,2,3.3%,0',
+                                           'elided,… 8 more rows,,,', 'data,"a,""b""",5,8.3%,1', 'data,c,n/a,,2',
+                                           'footer,12,60.0,100.0%,0']
+    out = io.StringIO()
+    t.write_json(out)
+    exported = json.loads(out.getvalue())
+    assert exported['columns'] == ['Name', 'Amt', 'Share'] and exported['types'] == ['text', 'integer', 'percentage']
+    assert exported['rows'][2] == {'kind': 'elided', 'text': '… 8 more rows'}
+    assert exported['rows'][4] == {'kind': 'data', 'cells': ['c', 'n/a', ''], 'values': [None, None, None],
+                                   'depths': [2, 0, 0]}
+    odd = ['Name  Amt', '----  ---', 'a     nan', 'b     inf', 'c     -inf', 'd     2']
+    out = io.StringIO()
+    Table(odd, get_columns(update_spaces_in_lines(odd, []))).write_json(out)
+    assert [row['values'][1] for row in json.loads(out.getvalue())['rows']] == [None, None, None, 2]  # valid JSON
+
+    buffers = t.to_buffers()
+    assert list(buffers.kinds) == [Kinds.data, Kinds.data, Kinds.elided, Kinds.data, Kinds.data, Kinds.footer]
+    amt = buffers['Amt']
+    assert amt.values == array('d', [1, 2, 0, 5, 0, 60]) and list(amt.valid) == [1, 1, 0, 1, 0, 1]
+    assert amt.memoryview().format == 'd' and amt.memoryview().obj is amt.values  # no copy
+    assert buffers['Name'].values is None and list(buffers['Name'].depths) == [0, 0, 0, 1, 2, 0]
+    assert list(buffers.data_mask()) == [1, 1, 0, 1, 1, 0]
+
+
+def test_footer_templates():
+    lines = ['Item    Cost   Price',
+             '----    ----   -----',
+             'a         10      15',
+             'b         30      45',
+             '----    ----   -----',
+             '<#>     <+>    <+>/<+col2>{.1%} markup, <+>-<+col2> margin, <avg>*2+1 avg']
+    t = Table(lines, get_columns(update_spaces_in_lines(lines, [])))
+    assert [c.text for c in t.rows[-1].cells] == ['2', '40.0', '150.0% markup, 20.0 margin, 61.0 avg']
+
+    for footer, text in [('<+> - 5 items', '60.0 - 5 items'), ('<+> / 2 kinds', '60.0 / 2 kinds')]:
+        lines[-1] = f'<#>     <+>    {footer}'  # spaced operators are text, as before there were expressions
+        t = Table(lines, get_columns(update_spaces_in_lines(lines, [])))
+        assert t.rows[-1].cells[2].text == text
+
+    lines[-1] = '<#>     <+>    <#>{.2f} items, <+>{,}'  # a count takes a float's format
+    t = Table(lines, get_columns(update_spaces_in_lines(lines, [])))
+    assert t.rows[-1].cells[2].text == '2.00 items, 60.0'
+    count = ['Name     Amt', 'Al         1', '<#>{.3}  <+>']
+    assert [c.text for c in Table(count, [(0, 7), (9, 12)]).rows[-1].cells] == ['2.0', '1.0']
+
+    template = compile_footer('<+col1>/<#>{,.2f}')
+    assert compile_footer('<+col1>/<#>{,.2f}') is template  # compiled once
+    assert [type(part) for part in compile_footer('(<+> of <#>)').parts] == [str, Field, str, Field, str]
+    lines[-1] = '<#>     <+>    <+col2>/<+col1> <avgcol1> <+col3>'
+    t = Table(lines, get_columns(update_spaces_in_lines(lines, [])))
+    assert t.rows[-1].cells[2].text == '-- -- 60.0'  # nothing to divide by or average in Item
+    for bad in ['<+col9>', '<+>{.1q}', '<%>/2']:
+        lines[-1] = f'<#>     <+>    {bad}'
+        with pytest.raises(ColumnsException):
+            Table(lines, get_columns(update_spaces_in_lines(lines, [])))
+
+
+def test_directives():
+    def table(lines, show_rows=None):
+        return Table(lines, get_columns(update_spaces_in_lines(lines, [])), show_rows)
+
+    lines = ['Country                Millions <sort desc>   Share',
+             '-------                --------------------   -----',
+             '- Americas',
+             '  - Mexico                            129',
+             '  - Brazil                            212',
+             '- Asia',
+             '  1. India                          1,379',
+             '  2. China                          1,439',
+             '',
+             'Elsewhere                               -',
+             'Chad                                   18',
+             '-------                --------------------   -----',
+             '<#>                                   <+>     <%>']
+    t = table(lines)
+    assert t.rows[0].cells[1].text == 'Millions'
+    assert [r.cells[0].text for r in t.rows[1:-1]] == ['Asia', 'China', 'India', 'Americas', 'Brazil', 'Mexico', '',
+                                                       'Chad', 'Elsewhere']  # a parent ranks by its best child
+    assert [r.cells[0].list_.order_sequence for r in t.rows[2:4]] == [1, 2]  # renumbered
+    assert [c.text for c in t.rows[-1].cells] == ['8', '3,177.0', '100.0%'] and t.rows[5].cells[2].text == '6.7%'
+
+    lines[0] = 'Country                Millions <top 2>       Share'
+    t = table(lines, show_rows=(1, 1))  # top N needs every row, so show_rows is off
+    assert [r.cells[0].text for r in t.rows] == ['Country', 'Asia', 'India', 'China', 'Americas', 'Mexico',
+                                                 'Brazil', '8']  # the top level rows, with their items
+    assert [c.text for c in t.rows[-1].cells] == ['8', '3,177.0', '100.0%']  # footer over every row
+
+    lines[0] = 'Country <sort>         Millions               Share'
+    assert [r.cells[0].text for r in table(lines).rows[1:7]] == ['Americas', 'Brazil', 'Mexico', 'Asia', 'China',
+                                                                 'India']
+    for values in (['3', 'nan', '1', '2'], ['nan', '3', '1', '2']):  # nan is no value, wherever it is
+        rows = ['Name  Value <sort>', '----  -----'] + [f'{name}     {value}' for name, value in zip('abcd', values)]
+        assert [r.cells[1].text for r in table(rows).rows[1:]] == ['1', '2', '3', 'nan']
+        rows[0] = 'Name  Value <top 2>'
+        assert [r.cells[1].text for r in table(rows).rows[1:]] == ['3', '2']
+
+    for bad in ['Country <top>          Millions               Share',
+                'Country <top 2>        Millions               Share',  # not a numeric column
+                'Country <sort>         Millions <sort>        Share']:
+        with pytest.raises(ColumnsException):
+            table([bad] + lines[1:])
@@ -0,0 +1,36 @@
+""" Tests of watch mode. """
+import os
+
+from columns.watch import Watcher
+
+TABLE = 'Name  Amt\n----  ---\na       1\nb       2\n'
+
+
+def test_watcher(tmp_path):
+    source, output = tmp_path / 'docs', tmp_path / 'html'
+    (source / 'sub').mkdir(parents=True)
+    (source / 'a.md').write_text(f'# A\n\n{TABLE}\n\nText  with  gaps  here\n')
+    (source / 'sub' / 'b.md').write_text('Just text\n')
+    watcher = Watcher(source, output)
+    assert sorted(p.name for p in watcher.build()) == ['a.md', 'b.md']
+    assert '<table class="columns">' in (output / 'a.html').read_text()
+    assert (output / 'sub' / 'b.html').exists()
+    assert watcher.poll(now=10.0) == []  # nothing changed
+
+    def touch(path, text):
+        path.write_text(text)
+        os.utime(path, ns=(path.stat().st_mtime_ns + 1_000_000_000,) * 2)
+
+    a = source / 'a.md'
+    touch(a, f'# A changed\n\n{TABLE}\n\nText  with  gaps  here\n')
+    assert watcher.poll(now=20.0) == []  # waiting for the burst to end
+    touch(a, f'# A changed again\n\n{TABLE}\n\nText  with  gaps  here\n')
+    assert watcher.poll(now=20.01) == []
+    assert watcher.poll(now=20.1) == [a]  # rendered once, after the debounce time
+    assert 'A changed again' in (output / 'a.html').read_text()
+    tables = watcher.tables[str(a)]
+    assert (tables.hits, tables.misses) == (1, 1)  # the unchanged table was reused
+
+    (source / 'sub' / 'b.md').unlink()
+    watcher.poll(now=30.0)
+    assert watcher.poll(now=30.1) == [source / 'sub' / 'b.md'] and not (output / 'sub' / 'b.html').exists()